@@ -0,0 +1,116 @@
+# doc_vectors.py
+# 批量计算文档向量：先把分词词表一次性映射为 Word2Vec 的行号，再对 CSR 形式的词 id 分块
+# 构建 文档×词 稀疏权重矩阵与 wv.vectors 相乘，代替逐行 [model.wv[t] for t in tokens] + np.mean
+#
+# 支持三种权重：
+#   mean   词向量的简单平均（原 tokens_to_vector）
+#   tfidf  按 TF × IDF 加权平均，IDF 由训练集文档频数计算（与 sklearn smooth_idf 相同的公式）
+#   sif    SIF 权重 a / (a + p(w))，p(w) 为训练集词频；再去掉训练集文档向量的第一主成分
+import numpy as np
+import scipy.sparse as sp
+
+
+def vocab_to_wv_index(vocab, wv):
+    """分词词表 id → wv.vectors 行号；不在 Word2Vec 词表中的词（如低于 min_count）为 -1"""
+    key_to_index = wv.key_to_index
+    return np.fromiter((key_to_index.get(t, -1) for t in vocab), dtype=np.int64, count=len(vocab))
+
+
+def _row_ids(corpus, lo, hi):
+    """第 lo..hi 行的词 id 及每个词所在的行号（相对 lo）"""
+    start, end = corpus.offsets[lo], corpus.offsets[hi]
+    rows = np.repeat(np.arange(hi - lo, dtype=np.int64), np.diff(corpus.offsets[lo:hi + 1]))
+    return corpus.ids[start:end], rows
+
+
+def word_counts(corpus, vocab_size=None, chunk_rows=100_000):
+    """
+    每个词的总出现次数和文档频数（出现该词的行数）
+
+    Args:
+        vocab_size (int): 结果数组长度；train/dev/test 共用词表时传入最终词表大小
+    """
+    vocab_size = vocab_size or len(corpus.vocab)
+    counts = np.zeros(vocab_size, dtype=np.int64)
+    doc_freq = np.zeros(vocab_size, dtype=np.int64)
+    for lo in range(0, len(corpus), chunk_rows):
+        hi = min(lo + chunk_rows, len(corpus))
+        ids, rows = _row_ids(corpus, lo, hi)
+        counts += np.bincount(ids, minlength=vocab_size)
+        # (行, 词) 去重后计数即文档频数
+        pairs = np.unique(rows * vocab_size + ids)
+        doc_freq += np.bincount(pairs % vocab_size, minlength=vocab_size)
+    return counts, doc_freq
+
+
+def idf_weights(corpus, vocab_size=None):
+    """IDF = ln((1 + N) / (1 + df)) + 1；训练集中没出现过的词 df = 0"""
+    _, doc_freq = word_counts(corpus, vocab_size)
+    return (np.log((1 + len(corpus)) / (1 + doc_freq)) + 1).astype(np.float32)
+
+
+def sif_weights(corpus, vocab_size=None, a=1e-3):
+    """SIF 权重 a / (a + p(w))，p(w) 为训练集中的词频"""
+    counts, _ = word_counts(corpus, vocab_size)
+    p = counts / max(counts.sum(), 1)
+    return (a / (a + p)).astype(np.float32)
+
+
+def weighted_doc_vectors(corpus, wv, word_weights=None, normalize="weights", chunk_rows=100_000,
+                         wv_index=None):
+    """
+    文档向量 = Σ w(t)·v(t) / 归一化项，只统计在 Word2Vec 词表中的词；没有可用词的行为零向量
+
+    Args:
+        word_weights: 按分词词表 id 排列的权重数组，None 表示全为 1
+        normalize: "weights" 除以该行权重之和（加权平均）；"count" 除以该行词数（SIF 的做法）
+        chunk_rows (int): 每块处理的行数，临时内存只与块内词数成正比
+    """
+    if wv_index is None:
+        wv_index = vocab_to_wv_index(corpus.vocab, wv)
+    vectors = wv.vectors
+    out = np.zeros((len(corpus), vectors.shape[1]), dtype=np.float32)
+
+    for lo in range(0, len(corpus), chunk_rows):
+        hi = min(lo + chunk_rows, len(corpus))
+        ids, rows = _row_ids(corpus, lo, hi)
+        columns = wv_index[ids]
+        keep = columns >= 0
+        ids, rows, columns = ids[keep], rows[keep], columns[keep]
+
+        weights = np.ones(len(ids), dtype=np.float32) if word_weights is None else word_weights[ids]
+        if normalize == "weights":
+            norm = np.bincount(rows, weights=weights, minlength=hi - lo)
+        else:
+            norm = np.bincount(rows, minlength=hi - lo)
+        weights = (weights / np.maximum(norm, 1e-12)[rows]).astype(np.float32)
+
+        # 文档×词 的权重矩阵乘以词向量矩阵；同一行重复出现的词自动累加（即 TF）
+        doc_term = sp.csr_matrix((weights, (rows, columns)), shape=(hi - lo, vectors.shape[0]))
+        out[lo:hi] = doc_term @ vectors
+    return out
+
+
+def mean_doc_vectors(corpus, wv, chunk_rows=100_000, wv_index=None):
+    """每行文档的平均词向量，与原 tokens_to_vector 结果一致"""
+    return weighted_doc_vectors(corpus, wv, None, "weights", chunk_rows, wv_index)
+
+
+def first_principal_component(X, chunk_rows=100_000):
+    """
+    X 的第一主成分方向（SIF 按原论文不做中心化）：分块累加 XᵀX（维度 × 维度），取最大特征向量
+    """
+    gram = np.zeros((X.shape[1], X.shape[1]), dtype=np.float64)
+    for lo in range(0, len(X), chunk_rows):
+        block = X[lo:lo + chunk_rows]
+        gram += block.T @ block
+    _, eigenvectors = np.linalg.eigh(gram)
+    return eigenvectors[:, -1].astype(np.float32)
+
+
+def remove_component(X, u, chunk_rows=100_000):
+    """原地去掉 X 在单位向量 u 方向上的投影：X ← X − (X·u)uᵀ"""
+    for lo in range(0, len(X), chunk_rows):
+        block = X[lo:lo + chunk_rows]
+        block -= np.outer(block @ u, u)
+    return X
@@ -0,0 +1,117 @@
+# external_shuffle.py
+# 外存打乱 + 分层划分（适用于大于内存的按行文本语料，如 fastText 格式 "__label__2 text..."）
+#
+# 1. 逐行读取，每行配一个 64 位随机键，攒满 run_bytes 后按键排序写成一个临时 run 文件，同时统计各标签行数
+# 2. heapq.merge 按键归并所有 run，得到整个文件的均匀随机排列（内存只占每个 run 一行）
+# 3. 归并过程中按标签配额分配 dev：每个标签恰好 round(行数 × dev_ratio) 行进入 dev
+# 4. 先写临时文件，完成后 os.replace 到目标路径；输出路径不能与输入相同
+import heapq
+import os
+import tempfile
+
+import numpy as np
+
+LABEL_PREFIX = "__label__"
+
+
+def line_label(line, prefix=LABEL_PREFIX):
+    """行首以 prefix 开头的第一个词作为标签；没有标签的行归为 ""。"""
+    if not line.startswith(prefix):
+        return ""
+    return line.split(None, 1)[0]
+
+
+def _write_run(buffer, tmp_dir):
+    buffer.sort(key=lambda item: item[0])
+    fd, path = tempfile.mkstemp(prefix="run-", suffix=".txt", dir=tmp_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for key, line in buffer:
+            f.write(f"{key:016x}\t{line}")
+    return path
+
+
+def _random_keys(rng, block=65536):
+    """成批生成随机键，避免逐行调用随机数生成器"""
+    while True:
+        yield from rng.integers(0, 2 ** 63, size=block).tolist()
+
+
+def spill_shuffled_runs(in_file, tmp_dir, run_bytes=256 * 1024 ** 2, seed=42, prefix=LABEL_PREFIX):
+    """
+    第一遍：把输入切成按随机键排好序的 run 文件
+
+    Returns:
+        (run 文件路径列表, {标签: 行数})
+    """
+    keys = _random_keys(np.random.default_rng(seed))
+    runs, label_counts = [], {}
+    buffer, buffer_bytes = [], 0
+    with open(in_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if not line.endswith("\n"):
+                line += "\n"
+            label = line_label(line, prefix)
+            label_counts[label] = label_counts.get(label, 0) + 1
+            buffer.append((next(keys), line))
+            buffer_bytes += len(line)
+            if buffer_bytes >= run_bytes:
+                runs.append(_write_run(buffer, tmp_dir))
+                buffer, buffer_bytes = [], 0
+    if buffer:
+        runs.append(_write_run(buffer, tmp_dir))
+    return runs, label_counts
+
+
+def merge_runs(runs):
+    """按随机键归并所有 run，逐行产出打乱后的原始行"""
+    files = [open(path, "r", encoding="utf-8") for path in runs]
+    try:
+        # 键为定长十六进制，直接按字符串比较即可
+        for record in heapq.merge(*files):
+            yield record[17:]
+    finally:
+        for f in files:
+            f.close()
+
+
+def shuffle_split(in_file, out_train, out_dev, dev_ratio=0.2, run_bytes=256 * 1024 ** 2,
+                  seed=42, prefix=LABEL_PREFIX, tmp_dir=None):
+    """
+    外存打乱并按标签分层划分 train / dev
+
+    Returns:
+        dict: {"train": 行数, "dev": 行数, "labels": {标签: [train 行数, dev 行数]}}
+    """
+    paths = {os.path.abspath(p) for p in (out_train, out_dev)}
+    if os.path.abspath(in_file) in paths:
+        raise ValueError("输出文件不能与输入文件相同")
+
+    tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(out_train))
+    os.makedirs(tmp_dir, exist_ok=True)
+    runs, label_counts = spill_shuffled_runs(in_file, tmp_dir, run_bytes, seed, prefix)
+    dev_quota = {label: int(round(count * dev_ratio)) for label, count in label_counts.items()}
+    stats = {label: [0, 0] for label in label_counts}
+
+    tmp_train, tmp_dev = out_train + ".tmp", out_dev + ".tmp"
+    try:
+        with open(tmp_train, "w", encoding="utf-8") as f_train, open(tmp_dev, "w", encoding="utf-8") as f_dev:
+            for line in merge_runs(runs):
+                label = line_label(line, prefix)
+                # 行已是随机顺序，每个标签的前 quota 行即为该标签的随机样本
+                if stats[label][1] < dev_quota[label]:
+                    f_dev.write(line)
+                    stats[label][1] += 1
+                else:
+                    f_train.write(line)
+                    stats[label][0] += 1
+        os.replace(tmp_train, out_train)
+        os.replace(tmp_dev, out_dev)
+    finally:
+        for path in runs + [tmp_train, tmp_dev]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    return {"train": sum(s[0] for s in stats.values()), "dev": sum(s[1] for s in stats.values()),
+            "labels": stats}
@@ -0,0 +1,77 @@
+# feature_store.py
+# 特征仓库：每个数组一个未压缩的 .npy 文件 + meta.json（形状、类型、说明），
+# 使用方以 mmap_mode='r' 打开，只读取需要的行，多个进程共享同一份页缓存，无需先解压整个 .npz
+#
+#   <store>/meta.json
+#   <store>/X_train.npy  X_dev.npy  X_test.npy   特征（float16 或 float32）
+#   <store>/y_train.npy  y_dev.npy  y_test.npy   标签
+import json
+import os
+
+import numpy as np
+
+META_FILE = "meta.json"
+
+
+def _array_path(store_dir, name):
+    return os.path.join(store_dir, f"{name}.npy")
+
+
+def write_array(store_dir, name, array, dtype=None, chunk_rows=100_000):
+    """
+    按块写出一个数组（可指定存储类型，如 float16），先写临时文件再改名
+
+    Returns:
+        (形状, 类型名)
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    dtype = np.dtype(dtype or array.dtype)
+    path = _array_path(store_dir, name)
+    tmp_path = path + ".tmp"
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=array.shape)
+    for lo in range(0, len(array), chunk_rows):
+        out[lo:lo + chunk_rows] = array[lo:lo + chunk_rows]
+    out.flush()
+    del out
+    os.replace(tmp_path, path)
+    return list(array.shape), dtype.name
+
+
+def save_features(store_dir, arrays, feature_dtype=np.float32, extra_meta=None):
+    """
+    保存一组数组：名称以 X_ 开头的按 feature_dtype 存储，其余（标签等）保持原类型；
+    最后写 meta.json，meta.json 存在即表示仓库完整（重写已有仓库时先删除旧的 meta.json，
+    中途失败不会留下看似完整的仓库）
+    """
+    meta_path = os.path.join(store_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    meta = {"arrays": {}, **(extra_meta or {})}
+    for name, array in arrays.items():
+        dtype = feature_dtype if name.startswith("X_") else None
+        shape, dtype_name = write_array(store_dir, name, np.asarray(array), dtype)
+        meta["arrays"][name] = {"shape": shape, "dtype": dtype_name}
+
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+    return meta
+
+
+def load_meta(store_dir):
+    with open(os.path.join(store_dir, META_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def open_array(store_dir, name, mmap_mode="r"):
+    """内存映射打开一个数组；切片 X[a:b] 只读取对应的行"""
+    return np.load(_array_path(store_dir, name), mmap_mode=mmap_mode)
+
+
+def load_features(store_dir, names=None, mmap_mode="r"):
+    """按 meta.json 打开仓库中的数组，返回 {名称: memmap}"""
+    meta = load_meta(store_dir)
+    names = names or list(meta["arrays"])
+    return {name: open_array(store_dir, name, mmap_mode) for name in names}
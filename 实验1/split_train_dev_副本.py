@@ -1,27 +1,40 @@
 # split_train_dev.py
+# 流式划分：按行内容的确定性哈希分配到 train / dev，每个分块直接追加写出，
+# 内存只占一个分块；重新运行得到完全相同的划分
 import os
 import pandas as pd
-from sklearn.model_selection import train_test_split
 
 DOWNLOAD_DIR = "/Users/xulingexu/Downloads"
 files = ["train_part_1.csv", "train_part_2.csv"]
 out_train = os.path.join(DOWNLOAD_DIR, "train_sampled.csv")
 out_dev   = os.path.join(DOWNLOAD_DIR, "dev_sampled.csv")
 
-# 流式读取 + 随机划分
-train_chunks, dev_chunks = [], []
-for f in files:
-    reader = pd.read_csv(os.path.join(DOWNLOAD_DIR, f),
-                         header=None, names=['score', 'title', 'body'],
-                         chunksize=500_000)
-    for chunk in reader:
-        tr, de = train_test_split(chunk, test_size=0.2,
-                                  random_state=42, shuffle=True)
-        train_chunks.append(tr)
-        dev_chunks.append(de)
+DEV_RATIO = 0.2
+HASH_BUCKETS = 10_000
+CHUNK_SIZE = 500_000
 
-pd.concat(train_chunks, ignore_index=True).to_csv(out_train, index=False, header=False)
-pd.concat(dev_chunks,   ignore_index=True).to_csv(out_dev,   index=False, header=False)
+# 先写临时文件，全部完成后再改名，中途失败不会留下半个输出文件
+tmp_train, tmp_dev = out_train + ".tmp", out_dev + ".tmp"
+n_train = n_dev = 0
+with open(tmp_train, "w", encoding="utf-8", newline="") as f_train, \
+     open(tmp_dev, "w", encoding="utf-8", newline="") as f_dev:
+    for f in files:
+        # 全部按字符串读取：行哈希不受类型推断影响，写出内容与原文件一致
+        reader = pd.read_csv(os.path.join(DOWNLOAD_DIR, f),
+                             header=None, names=['score', 'title', 'body'],
+                             dtype=str, keep_default_na=False,
+                             chunksize=CHUNK_SIZE)
+        for chunk in reader:
+            # 行键 = 整行内容；hash_pandas_object 使用固定的哈希密钥，结果与运行次数、分块大小无关
+            bucket = pd.util.hash_pandas_object(chunk, index=False).to_numpy() % HASH_BUCKETS
+            is_dev = bucket < int(DEV_RATIO * HASH_BUCKETS)
+            chunk[~is_dev].to_csv(f_train, index=False, header=False)
+            chunk[is_dev].to_csv(f_dev, index=False, header=False)
+            n_train += int((~is_dev).sum())
+            n_dev += int(is_dev.sum())
+
+os.replace(tmp_train, out_train)
+os.replace(tmp_dev, out_dev)
 print("划分完成：")
-print("  train_sampled.csv 行数:", sum(len(c) for c in train_chunks))
-print("  dev_sampled.csv   行数:", sum(len(c) for c in dev_chunks))
\ No newline at end of file
+print("  train_sampled.csv 行数:", n_train)
+print("  dev_sampled.csv   行数:", n_dev)
@@ -0,0 +1,213 @@
+# token_cache.py
+# 分词结果缓存（实验1 Word2Vec 与实验2 TextCNN 共用）：同一个评论 CSV 只读取、分词一次，
+# 结果按 CSR 形式（vocab.json 词表 + offsets.npy 行偏移 + ids.npy 词 id）保存在磁盘上，
+# 之后直接 np.load 读回 TokenizedCorpus。
+#
+# 缓存键 = 源文件内容的 sha256 + 文本列 + 读取参数 + 分词规则（TokenizerConfig），
+# 任一项改变都会得到新的缓存目录，不会读到过期结果：
+#
+#   <cache>/file_hashes.json                  (路径, 大小, 修改时间) → sha256，避免重复计算大文件哈希
+#   <cache>/<key>/vocab.json  offsets.npy  ids.npy
+#   <cache>/<key>/meta.json                   最后写入，存在即表示该条缓存完整
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from tokenize_engine_副本 import TokenizerConfig, TokenizedCorpus, tokenize
+
+DEFAULT_CACHE_DIR = "/Users/xulingexu/Downloads/token_cache"
+CACHE_VERSION = 1
+META_FILE = "meta.json"
+_HASHES_FILE = "file_hashes.json"
+
+
+def file_sha256(path, cache_dir=None, block_size=1 << 20):
+    """
+    源文件内容的 sha256；给定 cache_dir 时按 (绝对路径, 大小, 修改时间) 记住结果，文件未变化时不再重新计算
+    """
+    stat = os.stat(path)
+    memo_key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    memo_path = os.path.join(cache_dir, _HASHES_FILE) if cache_dir else None
+    memo = {}
+    if memo_path and os.path.exists(memo_path):
+        with open(memo_path, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+        if memo_key in memo:
+            return memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    sha = digest.hexdigest()
+
+    if memo_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        memo[memo_key] = sha
+        tmp_path = memo_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(memo, f, indent=2)
+        os.replace(tmp_path, memo_path)
+    return sha
+
+
+def config_fingerprint(config):
+    """分词规则的可序列化描述（停用词排序后保存，与集合的迭代顺序无关）"""
+    fields = asdict(config)
+    fields["stop_words"] = sorted(config.stop_words or ())
+    return fields
+
+
+def cache_key(sha, text_columns, read_csv_kwargs, config):
+    spec = {"version": CACHE_VERSION, "file": sha, "text_columns": list(text_columns),
+            "read_csv": read_csv_kwargs, "config": config_fingerprint(config)}
+    blob = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:20], spec
+
+
+def read_texts(path, text_columns, read_csv_kwargs):
+    """读取 CSV 中的文本列；多列时缺失值按空串、列之间用空格拼接"""
+    df = pd.read_csv(path, **read_csv_kwargs)
+    if len(text_columns) == 1:
+        return df[text_columns[0]]
+    texts = df[text_columns[0]].fillna("").astype(str)
+    for column in text_columns[1:]:
+        texts = texts + " " + df[column].fillna("").astype(str)
+    return texts
+
+
+def save_corpus(entry_dir, corpus, spec):
+    """写入一条缓存：先写到临时目录，完成后整体改名"""
+    tmp_dir = entry_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    with open(os.path.join(tmp_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(list(corpus.vocab), f, ensure_ascii=False)
+    np.save(os.path.join(tmp_dir, "offsets.npy"), corpus.offsets)
+    np.save(os.path.join(tmp_dir, "ids.npy"), corpus.ids)
+    meta = {**spec, "rows": len(corpus), "tokens": int(len(corpus.ids)), "vocab_size": len(corpus.vocab)}
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+
+
+def load_corpus(entry_dir, mmap_mode=None):
+    with open(os.path.join(entry_dir, "vocab.json"), "r", encoding="utf-8") as f:
+        vocab = json.load(f)
+    offsets = np.load(os.path.join(entry_dir, "offsets.npy"), mmap_mode=mmap_mode)
+    ids = np.load(os.path.join(entry_dir, "ids.npy"), mmap_mode=mmap_mode)
+    return TokenizedCorpus(vocab, offsets, ids)
+
+
+def cached_tokenize(path, text_columns, config=None, read_csv_kwargs=None, cache_dir=DEFAULT_CACHE_DIR,
+                    name=None, refresh=False, **tokenize_kwargs):
+    """
+    读取 CSV 的文本列并分词，结果按缓存键保存；缓存命中时不读取 CSV、不分词
+
+    Args:
+        text_columns (list): 文本列名，多列用空格拼接
+        read_csv_kwargs (dict): 传给 pd.read_csv 的参数（会计入缓存键，需可 JSON 序列化）
+        refresh (bool): 忽略已有缓存，重新分词
+        **tokenize_kwargs: 传给 tokenize（num_proc、chunk_size），不影响结果，不计入缓存键
+
+    Returns:
+        TokenizedCorpus：词表为该文件自己的词表，多个文件共用词 id 时用 shared_vocab 合并
+    """
+    config = config or TokenizerConfig()
+    read_csv_kwargs = read_csv_kwargs or {}
+    name = name or os.path.basename(path)
+
+    sha = file_sha256(path, cache_dir)
+    key, spec = cache_key(sha, text_columns, read_csv_kwargs, config)
+    entry_dir = os.path.join(cache_dir, key)
+
+    if not refresh and os.path.exists(os.path.join(entry_dir, META_FILE)):
+        start = time.time()
+        corpus = load_corpus(entry_dir)
+        print(f"  分词缓存命中 {name}: {len(corpus)} 行，{len(corpus.ids)} 个词，"
+              f"{time.time() - start:.1f} 秒（{entry_dir}）")
+        return corpus
+
+    texts = read_texts(path, text_columns, read_csv_kwargs)
+    corpus = tokenize(texts, config, name=name, **tokenize_kwargs)
+    save_corpus(entry_dir, corpus, {**spec, "source": os.path.abspath(path)})
+    return corpus
+
+
+def shared_vocab(corpora):
+    """
+    把各自独立词表的多个语料重映射到同一个词表（按 corpora 顺序、词首次出现的顺序编号），
+    结果与用同一个 vocab dict 依次调用 tokenize 相同
+
+    Returns:
+        (合并后的词表 dict, 重映射后的 TokenizedCorpus 列表)
+    """
+    vocab = {}
+    remapped = []
+    for corpus in corpora:
+        remap = np.fromiter((vocab.setdefault(t, len(vocab)) for t in corpus.vocab),
+                            dtype=np.int32, count=len(corpus.vocab))
+        remapped.append(TokenizedCorpus(None, corpus.offsets, remap[corpus.ids]))
+    vocab_list = list(vocab)
+    for corpus in remapped:
+        corpus.vocab = vocab_list
+    return vocab, remapped
+
+
+# ---------------- Keras Tokenizer 兼容（实验2） ----------------
+
+def keras_word_index(corpus, oov_token="<OOV>"):
+    """
+    与 keras Tokenizer.fit_on_texts 相同的 word_index：按词频降序编号（同频按首次出现顺序），
+    从 1 开始；设置 oov_token 时它占 1 号
+    """
+    counts = np.bincount(np.asarray(corpus.ids), minlength=len(corpus.vocab))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    sorted_voc = ([oov_token] if oov_token is not None else []) + [corpus.vocab[i] for i in order.tolist()]
+    return {w: i for i, w in enumerate(sorted_voc, 1)}
+
+
+def pad_ids(offsets, ids, maxlen, value=0):
+    """
+    与 keras pad_sequences 默认参数（padding='pre'、truncating='pre'）相同：
+    每行保留最后 maxlen 个 id，靠右对齐，左侧补 value
+    """
+    offsets = np.asarray(offsets)
+    lengths = np.diff(offsets)
+    take = np.minimum(lengths, maxlen)
+    out = np.full((len(lengths), maxlen), value, dtype=np.int32)
+    rows = np.repeat(np.arange(len(lengths)), take)
+    within = np.arange(int(take.sum())) - np.repeat(np.cumsum(take) - take, take)
+    src = np.repeat(offsets[1:] - take, take) + within
+    out[rows, maxlen - take[rows] + within] = ids[src]
+    return out
+
+
+def keras_sequences(corpus, word_index, maxlen, num_words=None, oov_token="<OOV>"):
+    """
+    等价于 pad_sequences(tokenizer.texts_to_sequences(texts), maxlen)：
+    编号 ≥ num_words 的词与未登录词记为 OOV 编号；没有 oov_token 时直接丢弃
+    """
+    lookup = np.fromiter((word_index.get(t, -1) for t in corpus.vocab), dtype=np.int64, count=len(corpus.vocab))
+    if num_words:
+        lookup[lookup >= num_words] = -1
+    if oov_token is not None:
+        lookup[lookup < 0] = word_index[oov_token]
+
+    ids = lookup[np.asarray(corpus.ids)]
+    offsets = np.asarray(corpus.offsets)
+    keep = ids >= 0
+    if not keep.all():
+        rows = np.repeat(np.arange(len(corpus)), np.diff(offsets))
+        offsets = np.zeros(len(corpus) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[keep], minlength=len(corpus)), out=offsets[1:])
+        ids = ids[keep]
+    return pad_ids(offsets, ids, maxlen)
@@ -0,0 +1,246 @@
+# tokenize_engine.py
+# 批量分词引擎：整块向量化清洗 + 多进程分块处理，结果为 CSR 形式的词 id 数组
+# （vocab 词表 + offsets 行偏移 + ids 词 id），不再为每行保存一个 Python 字符串列表
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+# 停用词
+STOP_WORDS = frozenset({
+    'i','me','my','myself','we','our','ours','ourselves','you','your','yours',
+    'yourself','yourselves','he','him','his','himself','she','her','hers',
+    'herself','it','its','itself','they','them','their','theirs','themselves',
+    'what','which','who','whom','this','that','these','those','am','is','are',
+    'was','were','be','been','being','have','has','had','having','do','does',
+    'did','doing','a','an','the','and','but','if','or','because','as','until',
+    'while','of','at','by','for','with','about','against','between','into',
+    'through','during','before','after','above','below','to','from','up','down',
+    'in','out','on','off','over','under','again','further','then','once','here',
+    'there','when','where','why','how','all','any','both','each','few','more',
+    'most','other','some','such','no','nor','not','only','own','same','so',
+    'than','too','very','s','t','can','will','just','don','should','now'
+})
+
+
+DEFAULT_PATTERN = r"[^a-zA-Z0-9\s]"
+
+# 默认规则在纯 ASCII 文本上的等价字节映射表（bytes.translate 比正则替换快一个数量级）
+_ASCII_CLEAN_TABLE = bytes(b if chr(b).isalnum() or chr(b).isspace() else ord(" ") for b in range(256))
+
+
+@dataclass(frozen=True)
+class TokenizerConfig:
+    """分词规则（默认与原 clean_tokenize 一致：小写、非字母数字替换为空格、去停用词、只保留长度 > 2 的词）"""
+    pattern: str = DEFAULT_PATTERN
+    replace: str = " "
+    lowercase: bool = True
+    stop_words: frozenset = field(default=STOP_WORDS)
+    min_len: int = 3
+
+
+class TokenizedCorpus:
+    """
+    CSR 形式的分词结果：第 i 行的词 id 为 ids[offsets[i]:offsets[i + 1]]，词为 vocab[id]
+    （vocab 为按 id 排列的词列表）。
+
+    可直接迭代得到每行的词列表（可多次迭代，能作为 gensim 的 sentences）。
+    """
+
+    def __init__(self, vocab, offsets, ids):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def row(self, i):
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def tokens(self, i):
+        vocab = self.vocab
+        return [vocab[j] for j in self.row(i).tolist()]
+
+    def __iter__(self):
+        vocab, ids, offsets = self.vocab, self.ids, self.offsets.tolist()
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            yield [vocab[j] for j in ids[start:end].tolist()]
+
+    def write_lines(self, path, chunk_rows=100_000):
+        """
+        每行一篇文档、词之间用空格分隔写出（gensim corpus_file / LineSentence 格式），
+        没有词的行不写。先写临时文件再改名。
+
+        Returns:
+            int: 写出的行数
+        """
+        vocab = np.asarray(self.vocab, dtype=object)
+        written = 0
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for lo in range(0, len(self), chunk_rows):
+                hi = min(lo + chunk_rows, len(self))
+                start = self.offsets[lo]
+                words = vocab[self.ids[start:self.offsets[hi]]]
+                if not len(words):
+                    continue
+                # 词与分隔符交错拼接：每行最后一个词后接换行，其余接空格
+                seps = np.full(len(words), " ", dtype=object)
+                row_ends = self.offsets[lo + 1:hi + 1] - start
+                seps[row_ends[np.diff(self.offsets[lo:hi + 1]) > 0] - 1] = "\n"
+                parts = np.empty(2 * len(words), dtype=object)
+                parts[0::2] = words
+                parts[1::2] = seps
+                f.write("".join(parts.tolist()))
+                written += int(np.count_nonzero(np.diff(self.offsets[lo:hi + 1])))
+        os.replace(tmp_path, path)
+        return written
+
+
+# 拼接一块文本时使用的行分隔符：属于 \s，默认清洗规则不会替换它
+_ROW_SEP = "\x1e"
+# 清洗后替换行分隔符的标记词：默认规则会把 \x00 清洗掉，因此清洗后的正文中不会出现
+_ROW_MARK = "\x00"
+
+
+def _split_joined(texts, config):
+    """
+    整块拼接成一个字符串后只调用一次 lower()、一次正则替换和一次 split()，
+    行边界用标记词表示。
+
+    Returns:
+        (全部词（含行标记）列表, 是否成功)；文本本身含分隔符/标记，或清洗规则会改动分隔符时返回失败
+    """
+    joined = _ROW_SEP.join(texts)
+    if joined.count(_ROW_SEP) != len(texts) - 1 or _ROW_MARK in joined:
+        return None, False
+    if config.lowercase:
+        joined = joined.lower()
+    if config.pattern == DEFAULT_PATTERN and config.replace == " " and joined.isascii():
+        joined = joined.encode("ascii").translate(_ASCII_CLEAN_TABLE).decode("ascii")
+    elif config.pattern:
+        joined = re.sub(config.pattern, config.replace, joined)
+    if joined.count(_ROW_SEP) != len(texts) - 1 or _ROW_MARK in joined:
+        return None, False
+    return joined.replace(_ROW_SEP, f" {_ROW_MARK} ").split(), True
+
+
+def _split_rows(texts, config):
+    """逐行的 pandas .str 清洗（拼接方式不可用时的退路），返回与 _split_joined 相同格式"""
+    series = pd.Series(texts, dtype=object)
+    if config.lowercase:
+        series = series.str.lower()
+    if config.pattern:
+        series = series.str.replace(config.pattern, config.replace, regex=True)
+    tokens = []
+    for i, row in enumerate(series.tolist()):
+        if i:
+            tokens.append(_ROW_MARK)
+        tokens.extend(row.split())
+    return tokens
+
+
+def tokenize_chunk(texts, config):
+    """
+    清洗并切分一块文本；停用词和长度过滤在去重后的词表上做一次，再按词 id 向量化筛选
+
+    Returns:
+        (本块词表 uniques, 本块词 id codes, 每行词数 lengths)
+    """
+    # 非字符串（缺失值等）按空行处理，与原实现一致
+    texts = [t if isinstance(t, str) else "" for t in texts]
+    if not texts:
+        return np.zeros(0, dtype=object), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+    tokens, ok = _split_joined(texts, config)
+    if not ok:
+        tokens = _split_rows(texts, config)
+
+    codes, uniques = pd.factorize(np.array(tokens, dtype=object), sort=False)
+    stop_words = config.stop_words or ()
+    keep_unique = np.fromiter((len(t) >= config.min_len and t not in stop_words and t != _ROW_MARK
+                               for t in uniques), dtype=bool, count=len(uniques))
+
+    # 每个词所在的行号 = 它之前的行标记数（numpy 比较字符串会去掉末尾的 \x00，这里按 Python 相等查找）
+    mark_code = next((i for i, t in enumerate(uniques) if t == _ROW_MARK), -1)
+    rows = np.cumsum(codes == mark_code)
+    keep = keep_unique[codes]
+    lengths = np.bincount(rows[keep], minlength=len(texts)).astype(np.int64)
+
+    # 只保留通过过滤的词，并把词 id 压缩为连续编号
+    new_id = np.cumsum(keep_unique, dtype=np.int64) - 1
+    return np.asarray(uniques[keep_unique], dtype=object), new_id[codes[keep]].astype(np.int32), lengths
+
+
+def _tokenize_chunk_star(args):
+    return tokenize_chunk(*args)
+
+
+def _bounded_imap(pool, func, iterable, max_pending):
+    """
+    有序的 imap，但最多只有 max_pending 个块在途
+    （Pool.imap 会一次性读完输入迭代器并把所有块放入任务队列，语料很大时内存不受控）
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def tokenize(texts, config=None, vocab=None, num_proc=None, chunk_size=100_000, name="texts"):
+    """
+    多进程分块分词，返回 TokenizedCorpus
+
+    Args:
+        texts: 可切片的文本序列（pandas Series、list 等）
+        vocab (dict): 共享的 {词: id}，多个数据集（train/dev/test）传入同一个 dict 即可共用词 id；
+            新出现的词追加到末尾
+        num_proc (int): 进程数，默认 CPU 核数；1 表示在当前进程中运行
+    """
+    config = config or TokenizerConfig()
+    vocab = {} if vocab is None else vocab
+    num_proc = num_proc or os.cpu_count()
+    if isinstance(texts, pd.Series):
+        texts = texts.to_numpy(dtype=object)
+    start = time.time()
+
+    tasks = ((texts[i:i + chunk_size], config) for i in range(0, len(texts), chunk_size))
+    id_chunks, length_chunks = [], []
+
+    def collect(result):
+        uniques, codes, lengths = result
+        remap = np.fromiter((vocab.setdefault(t, len(vocab)) for t in uniques),
+                            dtype=np.int32, count=len(uniques))
+        id_chunks.append(remap[codes])
+        length_chunks.append(lengths)
+
+    if num_proc > 1 and len(texts) > chunk_size:
+        with Pool(num_proc) as pool:
+            for result in _bounded_imap(pool, _tokenize_chunk_star, tasks, max_pending=2 * num_proc):
+                collect(result)
+    else:
+        for task in tasks:
+            collect(tokenize_chunk(*task))
+
+    lengths = np.concatenate(length_chunks) if length_chunks else np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    ids = np.concatenate(id_chunks) if id_chunks else np.zeros(0, dtype=np.int32)
+
+    elapsed = time.time() - start
+    print(f"  分词 {name}: {len(lengths)} 行，{len(ids)} 个词，{elapsed:.1f} 秒"
+          f"（{len(lengths) / max(elapsed, 1e-9):.0f} 行/秒）")
+    return TokenizedCorpus(list(vocab), offsets, ids)
+
@@ -1,24 +1,18 @@
 import os
 
-# 输入/输出路径
-in_file  = "data/train.txt"
-out_train = "data/train.txt"   # 覆盖原文件为 80%
-out_dev   = "data/dev.txt"     # 20% 作为验证集
+from external_shuffle_副本 import shuffle_split
 
-# 读取全部行
-with open(in_file, "r", encoding="utf-8") as f:
-    lines = f.readlines()
+# 输入/输出路径（不再覆盖输入文件）
+in_file   = "data/train.txt"
+out_train = "data/train_split.txt"   # 80% 训练集
+out_dev   = "data/dev.txt"           # 20% 作为验证集
 
-# 80/20 切分
-split_idx = int(0.8 * len(lines))
-
-# 写入
-with open(out_train, "w", encoding="utf-8") as f:
-    f.writelines(lines[:split_idx])
-
-with open(out_dev, "w", encoding="utf-8") as f:
-    f.writelines(lines[split_idx:])
+# 外存打乱 + 按标签分层划分：文件可大于内存，每个标签在 dev 中的比例与全量一致
+stats = shuffle_split(in_file, out_train, out_dev, dev_ratio=0.2,
+                      run_bytes=256 * 1024 ** 2, seed=42)
 
 print("划分完成：")
-print("  train.txt 行数:", len(lines[:split_idx]))
-print("  dev.txt   行数:", len(lines[split_idx:]))
\ No newline at end of file
+print(f"  {os.path.basename(out_train)} 行数:", stats["train"])
+print(f"  {os.path.basename(out_dev)} 行数:", stats["dev"])
+for label, (n_train, n_dev) in sorted(stats["labels"].items()):
+    print(f"  {label or '(无标签)'}: train {n_train}, dev {n_dev}")
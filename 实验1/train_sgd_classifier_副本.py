@@ -0,0 +1,174 @@
+# train_sgd_classifier.py
+# 外存训练线性分类器：特征仓库中的 X_train 以内存映射方式打开，按块读入、块内打乱后切成小批量，
+# 交给 SGDClassifier.partial_fit 增量训练；内存占用只与块大小有关，与特征总行数无关。
+#
+# 每轮随机打乱块的顺序和块内行的顺序，训练后在 dev 上评估，dev 准确率连续 patience 轮没有提升时提前停止，
+# 保留 dev 上最好的模型在 test 上评估；记录每轮耗时和吞吐（行/秒）。
+#
+# 用法：
+#   python train_sgd_classifier_副本.py
+#   python train_sgd_classifier_副本.py --store /path/to/w2v_features --epochs 30 --patience 5
+import argparse
+import copy
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from feature_store_副本 import load_meta, open_array
+
+STORE_DIR = "/Users/xulingexu/Downloads/w2v_features"
+OUTPUT_DIR = "results"
+
+
+def iter_blocks(n_rows, block_rows, rng=None):
+    """按块切分 [0, n_rows)，给定 rng 时打乱块的顺序"""
+    starts = np.arange(0, n_rows, block_rows)
+    if rng is not None:
+        starts = rng.permutation(starts)
+    for lo in starts.tolist():
+        yield lo, min(lo + block_rows, n_rows)
+
+
+def iter_batches(X, y, batch_size, block_rows, rng, scaler=None):
+    """
+    打乱的小批量：块的顺序随机，每块一次性顺序读入（内存映射只读取这一段），块内再打乱
+
+    Yields:
+        (特征 float32, 标签)
+    """
+    for lo, hi in iter_blocks(len(X), block_rows, rng):
+        X_block = np.asarray(X[lo:hi], dtype=np.float32)
+        y_block = np.asarray(y[lo:hi])
+        if scaler is not None:
+            X_block = scaler.transform(X_block)
+        order = rng.permutation(hi - lo)
+        for b in range(0, hi - lo, batch_size):
+            idx = order[b:b + batch_size]
+            yield X_block[idx], y_block[idx]
+
+
+def fit_scaler(X, block_rows):
+    """按块流式计算均值和方差（StandardScaler.partial_fit）"""
+    scaler = StandardScaler()
+    for lo, hi in iter_blocks(len(X), block_rows):
+        scaler.partial_fit(np.asarray(X[lo:hi], dtype=np.float32))
+    return scaler
+
+
+def evaluate(model, X, y, block_rows, scaler=None):
+    """按块预测，返回准确率"""
+    correct = 0
+    for lo, hi in iter_blocks(len(X), block_rows):
+        X_block = np.asarray(X[lo:hi], dtype=np.float32)
+        if scaler is not None:
+            X_block = scaler.transform(X_block)
+        correct += int(np.count_nonzero(model.predict(X_block) == np.asarray(y[lo:hi])))
+    return correct / max(len(X), 1)
+
+
+def train(X_train, y_train, X_dev, y_dev, classes, epochs=20, patience=3, batch_size=4096,
+          block_rows=262_144, seed=42, scaler=None, **sgd_params):
+    """
+    多轮 partial_fit 训练，dev 准确率连续 patience 轮没有提升时停止
+
+    Returns:
+        (dev 上最好的模型, 每轮记录列表)
+    """
+    rng = np.random.default_rng(seed)
+    model = SGDClassifier(random_state=seed, **sgd_params)
+    best_model, best_acc, bad_epochs = None, -1.0, 0
+    history = []
+
+    for epoch in range(1, epochs + 1):
+        start = time.time()
+        n_rows = 0
+        for X_batch, y_batch in iter_batches(X_train, y_train, batch_size, block_rows, rng, scaler):
+            model.partial_fit(X_batch, y_batch, classes=classes)
+            n_rows += len(X_batch)
+        train_time = time.time() - start
+        dev_acc = evaluate(model, X_dev, y_dev, block_rows, scaler)
+
+        record = {"epoch": epoch, "train_seconds": round(train_time, 3),
+                  "rows_per_second": round(n_rows / max(train_time, 1e-9), 1), "dev_accuracy": round(dev_acc, 6)}
+        history.append(record)
+        print(f"  epoch {epoch:>3}: {train_time:.1f} 秒，{record['rows_per_second']:.0f} 行/秒，dev acc {dev_acc:.4f}")
+
+        if dev_acc > best_acc:
+            best_model, best_acc, bad_epochs = copy.deepcopy(model), dev_acc, 0
+        else:
+            bad_epochs += 1
+            if bad_epochs >= patience:
+                print(f"  dev 准确率连续 {patience} 轮没有提升，提前停止")
+                break
+    return best_model, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在 Word2Vec 特征仓库上外存训练 SGD 线性分类器")
+    parser.add_argument("--store", default=STORE_DIR, help="特征仓库目录（w2v_vectors 的输出）")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--loss", default="log_loss", help="SGDClassifier 的 loss，如 log_loss、hinge")
+    parser.add_argument("--alpha", type=float, default=1e-4)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--patience", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--block-rows", type=int, default=262_144, help="每次从磁盘读入的行数")
+    parser.add_argument("--no-scale", action="store_true", help="不做流式标准化")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.epochs < 1:
+        parser.error("--epochs 至少为 1")
+
+    meta = load_meta(args.store)
+    X_train, y_train = open_array(args.store, "X_train"), open_array(args.store, "y_train")
+    X_dev, y_dev = open_array(args.store, "X_dev"), open_array(args.store, "y_dev")
+    X_test, y_test = open_array(args.store, "X_test"), open_array(args.store, "y_test")
+    classes = np.unique(y_train)
+    print(f"特征仓库 {args.store}：train {X_train.shape}，dev {X_dev.shape}，test {X_test.shape}，"
+          f"类型 {X_train.dtype}，类别 {classes.tolist()}")
+
+    scaler = None if args.no_scale else fit_scaler(X_train, args.block_rows)
+    start = time.time()
+    model, history = train(X_train, y_train, X_dev, y_dev, classes, args.epochs, args.patience,
+                           args.batch_size, args.block_rows, args.seed, scaler,
+                           loss=args.loss, alpha=args.alpha)
+    total_time = time.time() - start
+
+    best = max(history, key=lambda r: r["dev_accuracy"])
+    test_acc = evaluate(model, X_test, y_test, args.block_rows, scaler)
+    # 吞吐只计 partial_fit 阶段（不含 dev 评估）
+    train_seconds = sum(r["train_seconds"] for r in history)
+    print(f"训练完成：{len(history)} 轮，{total_time:.1f} 秒；最好 dev acc {best['dev_accuracy']:.4f}"
+          f"（第 {best['epoch']} 轮），test acc {test_acc:.4f}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    model_path = os.path.join(args.output_dir, "sgd_classifier.pkl")
+    with open(model_path, "wb") as f:
+        pickle.dump({"scaler": scaler, "model": model, "classes": classes.tolist()}, f)
+
+    report = {
+        "store": os.path.abspath(args.store),
+        "doc_vector_mode": meta.get("doc_vector_mode"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("store", "output_dir")},
+        "epochs_run": len(history),
+        "best_epoch": best["epoch"],
+        "dev_accuracy": best["dev_accuracy"],
+        "test_accuracy": round(test_acc, 6),
+        "total_train_seconds": round(total_time, 3),
+        "rows_per_second": round(len(X_train) * len(history) / max(train_seconds, 1e-9), 1),
+        "history": history,
+    }
+    report_path = os.path.join(args.output_dir, "sgd_classifier.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("模型已保存为：", model_path)
+    print("训练报告已保存为：", report_path)
+
+
+if __name__ == "__main__":
+    main()
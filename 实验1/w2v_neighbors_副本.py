@@ -0,0 +1,116 @@
+# w2v_neighbors.py
+# 批量近邻表：词向量只归一化一次，按块做矩阵乘法求余弦相似度，argpartition 取 top-k，
+# 结果以 int32 词 id + float16 相似度的紧凑表格保存；可选构建 faiss ANN 索引
+#
+# 用法：
+#   python w2v_neighbors_副本.py --topn 10                       # 全部词表
+#   python w2v_neighbors_副本.py --queries music excellent game   # 指定查询词
+import argparse
+import os
+import time
+
+import numpy as np
+from gensim.models import Word2Vec
+
+MODEL_PATH = "/Users/xulingexu/Downloads/amazon_w2v_128.model"
+OUTPUT_PATH = "results/neighbors.npz"
+
+
+def normalized_vectors(wv):
+    """单位长度的词向量矩阵（float32）"""
+    vectors = np.asarray(wv.vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def nearest_neighbors(normed, query_ids, topn=10, block_size=1024, score_dtype=np.float32):
+    """
+    每个查询词的 topn 个近邻（不含自身），按相似度降序
+
+    Args:
+        normed: 单位化词向量矩阵 (V, d)
+        query_ids: 查询词在词表中的行号
+        block_size (int): 每块查询数；临时内存约为 block_size × V × 12 字节
+            （float32 相似度 4 字节 + argpartition 返回的 int64 下标 8 字节）
+        score_dtype: 相似度的存储类型；float16 只适合紧凑的近邻表（[0.5, 1) 区间精度约 0.0005）
+
+    Returns:
+        (近邻 id int32 (n, topn), 相似度 score_dtype (n, topn))；词表只有一个词时 topn 为 0
+    """
+    query_ids = np.asarray(query_ids, dtype=np.int64)
+    topn = max(min(topn, len(normed) - 1), 0)
+    ids = np.empty((len(query_ids), topn), dtype=np.int32)
+    scores = np.empty((len(query_ids), topn), dtype=score_dtype)
+    if topn == 0:
+        return ids, scores
+
+    for lo in range(0, len(query_ids), block_size):
+        block = query_ids[lo:lo + block_size]
+        sims = normed[block] @ normed.T
+        sims[np.arange(len(block)), block] = -np.inf  # 排除自身
+        # 直接对 sims 分区（不复制取负），只保证最后 topn 个是最大的，再对这 topn 个排序
+        top = np.argpartition(sims, sims.shape[1] - topn, axis=1)[:, -topn:]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        ids[lo:lo + len(block)] = np.take_along_axis(top, order, axis=1)
+        scores[lo:lo + len(block)] = np.take_along_axis(top_sims, order, axis=1)
+    return ids, scores
+
+
+def build_ann_index(normed, m=32, ef_construction=200):
+    """可选：faiss HNSW 内积索引（向量已归一化，内积即余弦相似度）；未安装 faiss 时返回 None"""
+    try:
+        import faiss
+    except ImportError:
+        print("未安装 faiss，跳过 ANN 索引（pip install faiss-cpu）")
+        return None
+    index = faiss.IndexHNSWFlat(normed.shape[1], m, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = ef_construction
+    index.add(np.ascontiguousarray(normed, dtype=np.float32))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word2Vec 批量近邻表")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--queries", nargs="*", default=None, help="查询词，默认全部词表")
+    parser.add_argument("--topn", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--ann-index", default=None, help="同时构建 faiss HNSW 索引并保存到该路径")
+    args = parser.parse_args()
+
+    wv = Word2Vec.load(args.model).wv
+    start = time.time()
+    normed = normalized_vectors(wv)
+
+    if args.queries:
+        missing = [q for q in args.queries if q not in wv.key_to_index]
+        if missing:
+            print("不在词表中，已跳过：", missing)
+        query_ids = np.array([wv.key_to_index[q] for q in args.queries if q in wv.key_to_index], dtype=np.int64)
+    else:
+        query_ids = np.arange(len(wv.index_to_key), dtype=np.int64)
+
+    # 近邻表相似度存为 float16，体积减半
+    ids, scores = nearest_neighbors(normed, query_ids, args.topn, args.block_size, score_dtype=np.float16)
+    elapsed = time.time() - start
+    print(f"近邻计算完成：{len(query_ids)} 个查询词，词表 {len(normed)}，耗时 {elapsed:.1f} 秒"
+          f"（{len(query_ids) / max(elapsed, 1e-9):.0f} 词/秒）")
+
+    # 紧凑表格：查询 id、近邻 id（int32）、相似度（float16）；词表按 id 顺序保存
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    np.savez(args.output, query_ids=query_ids.astype(np.int32), neighbor_ids=ids, scores=scores,
+             vocab=np.array(wv.index_to_key, dtype=str))
+    print("近邻表已保存为：", args.output)
+
+    if args.ann_index:
+        index = build_ann_index(normed)
+        if index is not None:
+            import faiss
+            faiss.write_index(index, args.ann_index)
+            print("ANN 索引已保存为：", args.ann_index)
+
+
+if __name__ == "__main__":
+    main()
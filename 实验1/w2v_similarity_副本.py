@@ -2,21 +2,24 @@ from gensim.models import Word2Vec
 import pandas as pd
 import os
 
+from w2v_neighbors_副本 import normalized_vectors, nearest_neighbors
+
 # 1. 加载模型
 model = Word2Vec.load('/Users/xulingexu/Downloads/amazon_w2v_128.model')
 
 # 2. 准备查询词（可随意增删）
 queries = ["music", "excellent", "game", "book", "price"]
+queries = [q for q in queries if q in model.wv]
 
-# 3. 收集结果
+# 3. 收集结果：一次矩阵乘法算出全部查询词的近邻（代替逐个 most_similar）
+ids, scores = nearest_neighbors(normalized_vectors(model.wv),
+                                [model.wv.key_to_index[q] for q in queries], topn=10)
 rows = []
-for q in queries:
-    if q not in model.wv:
-        continue
-    for w, s in model.wv.most_similar(q, topn=10):
-        rows.append({"query": q, "similar_word": w, "similarity": round(s, 4)})
+for q, q_ids, q_scores in zip(queries, ids, scores):
+    for i, s in zip(q_ids, q_scores):
+        rows.append({"query": q, "similar_word": model.wv.index_to_key[i], "similarity": round(float(s), 4)})
 
 # 4. 写 CSV
 os.makedirs("results", exist_ok=True)
 pd.DataFrame(rows).to_csv("results/similarity.csv", index=False, encoding="utf-8")
-print("已生成 results/similarity.csv，共", len(rows), "行")
\ No newline at end of file
+print("已生成 results/similarity.csv，共", len(rows), "行")
@@ -1,20 +1,39 @@
 # w2v_vectors.py
 import os
+import time
 import pandas as pd
 import numpy as np
 from gensim.models import Word2Vec
-import re
+
+from tokenize_engine_副本 import TokenizerConfig
+from token_cache_副本 import cached_tokenize, shared_vocab
+from feature_store_副本 import save_features
+from doc_vectors_副本 import (mean_doc_vectors, weighted_doc_vectors, idf_weights, sif_weights,
+                            first_principal_component, remove_component)
 
 DOWNLOAD_DIR = "/Users/xulingexu/Downloads"
 train_path = os.path.join(DOWNLOAD_DIR, "train_sampled.csv")
 dev_path   = os.path.join(DOWNLOAD_DIR, "dev_sampled.csv")
 test_path  = os.path.join(DOWNLOAD_DIR, "test.csv")
 
-# 读取 3 列无表头 CSV
 cols = ['score', 'title', 'body']
-train_df = pd.read_csv(train_path, header=None, names=cols, low_memory=False)
-dev_df   = pd.read_csv(dev_path,   header=None, names=cols, low_memory=False)
-test_df  = pd.read_csv(test_path,  header=None, names=cols, low_memory=False)
+read_csv_kwargs = dict(header=None, names=cols, low_memory=False)
+
+# 分词缓存（与实验2 共用）：按文件内容哈希 + 分词规则缓存 CSR 词 id 数组，重复运行时不再分词
+token_cache_dir = os.path.join(DOWNLOAD_DIR, "token_cache")
+
+# 从磁盘流式训练：清洗后的训练语料写成每行一篇文档的文本文件，gensim 用 corpus_file 模式读取，
+# 各 worker 线程直接按文件偏移读取，不受 GIL 限制，训练内存也不随语料规模增长
+USE_CORPUS_FILE = True
+corpus_path = os.path.join(DOWNLOAD_DIR, "train_corpus.txt")
+
+# 文档向量的词权重："mean" 简单平均；"tfidf" TF-IDF 加权平均；"sif" SIF 加权并去掉第一主成分
+DOC_VECTOR_MODE = "mean"
+
+# 特征仓库：每个数组一个 .npy（可用 np.load(..., mmap_mode='r') 直接映射），特征可存为 float16 减半体积
+feature_store_dir = os.path.join(DOWNLOAD_DIR, "w2v_features")
+FEATURE_DTYPE = np.float32
+
 
 def extract_label(df):
     scores = df['score'].astype(str).str.replace('"', '').astype(int)
@@ -22,62 +41,66 @@ def extract_label(df):
     labels = scores.map({1: 0, 2: 1})
     return np.ones(len(df), dtype=bool), labels.values
 
-mask_train, y_train = extract_label(train_df)
-mask_dev,   y_dev   = extract_label(dev_df)
-mask_test,  y_test  = extract_label(test_df)
-
-# 停用词
-STOP_WORDS = {
-    'i','me','my','myself','we','our','ours','ourselves','you','your','yours',
-    'yourself','yourselves','he','him','his','himself','she','her','hers',
-    'herself','it','its','itself','they','them','their','theirs','themselves',
-    'what','which','who','whom','this','that','these','those','am','is','are',
-    'was','were','be','been','being','have','has','had','having','do','does',
-    'did','doing','a','an','the','and','but','if','or','because','as','until',
-    'while','of','at','by','for','with','about','against','between','into',
-    'through','during','before','after','above','below','to','from','up','down',
-    'in','out','on','off','over','under','again','further','then','once','here',
-    'there','when','where','why','how','all','any','both','each','few','more',
-    'most','other','some','such','no','nor','not','only','own','same','so',
-    'than','too','very','s','t','can','will','just','don','should','now'
-}
-
-def clean_tokenize(text):
-    if not isinstance(text, str):
-        return []
-    text = re.sub(r"[^a-zA-Z0-9\s]", " ", text.lower())
-    tokens = text.split()
-    return [t for t in tokens if t not in STOP_WORDS and len(t) > 2]
-
-for df in [train_df, dev_df, test_df]:
-    df['tokens'] = df['body'].apply(clean_tokenize)
-
-# 训练 Word2Vec（128 维）
-w2v_model = Word2Vec(
-    sentences=train_df['tokens'],
-    vector_size=128,
-    window=5,
-    min_count=2,
-    workers=4,
-    seed=42
-)
-
-def tokens_to_vector(tokens, model):
-    vectors = [model.wv[t] for t in tokens if t in model.wv]
-    return np.mean(vectors, axis=0) if vectors else np.zeros(model.vector_size)
-
-X_train = np.vstack(train_df['tokens'][mask_train].apply(lambda x: tokens_to_vector(x, w2v_model)))
-X_dev   = np.vstack(dev_df['tokens'][mask_dev].apply(lambda x: tokens_to_vector(x, w2v_model)))
-X_test  = np.vstack(test_df['tokens'][mask_test].apply(lambda x: tokens_to_vector(x, w2v_model)))
-
-# 保存
-save_path = os.path.join(DOWNLOAD_DIR, "w2v_vectors_fixed.npz")
-np.savez_compressed(save_path,
-                    X_train=X_train, y_train=y_train,
-                    X_dev=X_dev,     y_dev=y_dev,
-                    X_test=X_test,   y_test=y_test)
-w2v_model.save(os.path.join(DOWNLOAD_DIR, "amazon_w2v_128.model"))
-print("词向量已保存为：", save_path)
-print("训练集:", X_train.shape, y_train.shape)
-print("开发集:", X_dev.shape,   y_dev.shape)
-print("测试集:", X_test.shape,  y_test.shape)
\ No newline at end of file
+
+def main():
+    # 读取 3 列无表头 CSV 的标签列（正文只在分词缓存未命中时读取）
+    train_df = pd.read_csv(train_path, usecols=['score'], **read_csv_kwargs)
+    dev_df   = pd.read_csv(dev_path,   usecols=['score'], **read_csv_kwargs)
+    test_df  = pd.read_csv(test_path,  usecols=['score'], **read_csv_kwargs)
+
+    mask_train, y_train = extract_label(train_df)
+    mask_dev,   y_dev   = extract_label(dev_df)
+    mask_test,  y_test  = extract_label(test_df)
+
+    # 分词：多进程分块处理并按文件缓存，结果为词 id 的 CSR 数组；再合并为 train/dev/test 共用的词表
+    config = TokenizerConfig()
+    corpora = [cached_tokenize(path, ['body'], config, read_csv_kwargs, token_cache_dir, name=name)
+               for path, name in ((train_path, "train"), (dev_path, "dev"), (test_path, "test"))]
+    vocab, (train_tokens, dev_tokens, test_tokens) = shared_vocab(corpora)
+
+    # 训练 Word2Vec（128 维）
+    w2v_params = dict(vector_size=128, window=5, min_count=2, seed=42)
+    start = time.time()
+    if USE_CORPUS_FILE:
+        n_lines = train_tokens.write_lines(corpus_path)
+        print(f"训练语料已写入 {corpus_path}（{n_lines} 行）")
+        w2v_model = Word2Vec(corpus_file=corpus_path, workers=os.cpu_count(), **w2v_params)
+    else:
+        # TokenizedCorpus 可重复迭代，逐行产出词列表
+        w2v_model = Word2Vec(sentences=train_tokens, workers=4, **w2v_params)
+    print(f"Word2Vec 训练耗时 {time.time() - start:.1f} 秒")
+
+    # 文档向量：分块稀疏矩阵乘法批量计算（float32）；权重统计量只用训练集
+    wv = w2v_model.wv
+    splits = [train_tokens, dev_tokens, test_tokens]
+    if DOC_VECTOR_MODE == "tfidf":
+        idf = idf_weights(train_tokens, vocab_size=len(vocab))
+        X_train, X_dev, X_test = [weighted_doc_vectors(c, wv, idf) for c in splits]
+    elif DOC_VECTOR_MODE == "sif":
+        sif = sif_weights(train_tokens, vocab_size=len(vocab))
+        X_train, X_dev, X_test = [weighted_doc_vectors(c, wv, sif, normalize="count") for c in splits]
+        u = first_principal_component(X_train)
+        for X in (X_train, X_dev, X_test):
+            remove_component(X, u)
+    else:
+        X_train, X_dev, X_test = [mean_doc_vectors(c, wv) for c in splits]
+    X_train, X_dev, X_test = X_train[mask_train], X_dev[mask_dev], X_test[mask_test]
+    print(f"文档向量（{DOC_VECTOR_MODE}）计算完成")
+
+    # 保存
+    save_features(feature_store_dir,
+                  {"X_train": X_train, "y_train": y_train,
+                   "X_dev": X_dev,     "y_dev": y_dev,
+                   "X_test": X_test,   "y_test": y_test},
+                  feature_dtype=FEATURE_DTYPE,
+                  extra_meta={"doc_vector_mode": DOC_VECTOR_MODE, "vector_size": w2v_model.vector_size})
+    w2v_model.save(os.path.join(DOWNLOAD_DIR, "amazon_w2v_128.model"))
+    print("词向量已保存到特征仓库：", feature_store_dir)
+    print("训练集:", X_train.shape, y_train.shape)
+    print("开发集:", X_dev.shape,   y_dev.shape)
+    print("测试集:", X_test.shape,  y_test.shape)
+
+
+# 分词使用多进程：入口放在 main 中，避免子进程（spawn 方式）导入本模块时重复读取数据
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,87 @@
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
-# 读取数据
-train = pd.read_csv('/Users/xulingexu/Desktop/train.csv', header=None)
-dev   = pd.read_csv('/Users/xulingexu/Desktop/dev.csv',   header=None)
-test  = pd.read_csv('/Users/xulingexu/Desktop/test.csv',  header=None)
+# 分词缓存模块在实验1（与 Word2Vec 流水线共用同一份缓存）
+_EXP1_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "实验1")
+if _EXP1_DIR not in sys.path:
+    sys.path.insert(0, _EXP1_DIR)
+
+from tokenize_engine_副本 import TokenizerConfig  # noqa: E402
+from token_cache_副本 import cached_tokenize, keras_word_index, keras_sequences  # noqa: E402
+
+data_dir = '/Users/xulingexu/Desktop'
+train_path = os.path.join(data_dir, 'train.csv')
+dev_path   = os.path.join(data_dir, 'dev.csv')
+test_path  = os.path.join(data_dir, 'test.csv')
+token_cache_dir = '/Users/xulingexu/Downloads/token_cache'
 
 # 命名列
 columns = ['popularity', 'title', 'content']
-train.columns = columns
-dev.columns   = columns
-test.columns  = columns
-
-# 查看前几行
-print(train.head())
-
-# 合并 title 和 content，用空格隔开
-train['text'] = (train['title'].fillna('') + ' ' + train['content'].fillna('')).str.strip()
-dev['text']   = (dev['title'].fillna('')   + ' ' + dev['content'].fillna('')).str.strip()
-test['text']  = (test['title'].fillna('')  + ' ' + test['content'].fillna('')).str.strip()
-
-# 把 popularity 从 1/2 映射到 0/1（负面=0，正面=1）
-train['popularity'] = train['popularity'] - 1
-dev['popularity']   = dev['popularity']   - 1
-test['popularity']  = test['popularity']  - 1
-
-# 只看我们需要的两列
-train = train[['popularity', 'text']]
-dev   = dev[['popularity', 'text']]
-test  = test[['popularity', 'text']]
-
-# 快速确认
-print(train.head())
-
-import re
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-
-# 1. 文本清洗函数
-def clean(text):
-    text = str(text).lower()
-    text = re.sub(r"[^a-z0-9\s]", "", text)   # 仅保留字母、数字、空格
-    text = re.sub(r"\s+", " ", text).strip()  # 合并多余空格
-    return text
-
-train['text'] = train['text'].apply(clean)
-dev['text']   = dev['text'].apply(clean)
-test['text']  = test['text'].apply(clean)
-
-# 2. 构建词汇表
+
 MAX_VOCAB = 20000
 MAX_LEN   = 100
-
-tokenizer = Tokenizer(num_words=MAX_VOCAB, oov_token="<OOV>")
-tokenizer.fit_on_texts(train['text'])
-
-# 3. 转为序列并填充
-X_train = pad_sequences(tokenizer.texts_to_sequences(train['text']), maxlen=MAX_LEN)
-X_dev   = pad_sequences(tokenizer.texts_to_sequences(dev['text']),   maxlen=MAX_LEN)
-X_test  = pad_sequences(tokenizer.texts_to_sequences(test['text']),  maxlen=MAX_LEN)
-
-y_train = train['popularity'].values
-y_dev   = dev['popularity'].values
-y_test  = test['popularity'].values
-
-# 4. 快速确认形状
-print("X_train shape:", X_train.shape, "y_train shape:", y_train.shape)
-print("X_dev   shape:", X_dev.shape,   "y_dev   shape:", y_dev.shape)
-print("X_test  shape:", X_test.shape,  "y_test  shape:", y_test.shape)
-
-# 打印清洗后的样例
-print("\nCleaned sample:")
-print(train['text'].iloc[0])
-
-# 打印序列化后的样例
-print("\nSequence sample:")
-print(X_train[0])
-
-import numpy as np
-import os
-
-save_dir = '/Users/xulingexu/Desktop'
-np.save(os.path.join(save_dir, 'X_train.npy'), X_train)
-np.save(os.path.join(save_dir, 'X_dev.npy'),   X_dev)
-np.save(os.path.join(save_dir, 'X_test.npy'),  X_test)
-np.save(os.path.join(save_dir, 'y_train.npy'), y_train)
-np.save(os.path.join(save_dir, 'y_dev.npy'),   y_dev)
-np.save(os.path.join(save_dir, 'y_test.npy'),  y_test)
-print("Saved .npy files to Desktop.")
+OOV_TOKEN = "<OOV>"
+
+
+def main():
+    # 读取标签列（正文只在分词缓存未命中时读取），把 popularity 从 1/2 映射到 0/1（负面=0，正面=1）
+    train = pd.read_csv(train_path, header=None, names=columns, usecols=['popularity'])
+    dev   = pd.read_csv(dev_path,   header=None, names=columns, usecols=['popularity'])
+    test  = pd.read_csv(test_path,  header=None, names=columns, usecols=['popularity'])
+    train['popularity'] = train['popularity'] - 1
+    dev['popularity']   = dev['popularity']   - 1
+    test['popularity']  = test['popularity']  - 1
+
+    # 快速确认
+    print(train.head())
+
+    # 1. 文本清洗规则：title 和 content 用空格拼接；与原 clean 函数一致（小写，删除字母、数字、空白以外的字符，
+    #    按空白切分），不去停用词、不限制词长；分词结果按文件内容缓存，重复运行时不再清洗和分词
+    config = TokenizerConfig(pattern=r"[^a-z0-9\s]", replace="", stop_words=frozenset(), min_len=1)
+    read_csv_kwargs = dict(header=None, names=columns)
+    text_columns = ['title', 'content']
+    train_tokens = cached_tokenize(train_path, text_columns, config, read_csv_kwargs, token_cache_dir, name="train")
+    dev_tokens   = cached_tokenize(dev_path,   text_columns, config, read_csv_kwargs, token_cache_dir, name="dev")
+    test_tokens  = cached_tokenize(test_path,  text_columns, config, read_csv_kwargs, token_cache_dir, name="test")
+
+    # 2. 构建词汇表（与 keras Tokenizer(num_words=MAX_VOCAB, oov_token="<OOV>").fit_on_texts 相同的编号）
+    word_index = keras_word_index(train_tokens, oov_token=OOV_TOKEN)
+
+    # 3. 转为序列并填充（等价于 texts_to_sequences + pad_sequences，直接在词 id 数组上向量化完成）
+    X_train = keras_sequences(train_tokens, word_index, MAX_LEN, MAX_VOCAB, OOV_TOKEN)
+    X_dev   = keras_sequences(dev_tokens,   word_index, MAX_LEN, MAX_VOCAB, OOV_TOKEN)
+    X_test  = keras_sequences(test_tokens,  word_index, MAX_LEN, MAX_VOCAB, OOV_TOKEN)
+
+    y_train = train['popularity'].values
+    y_dev   = dev['popularity'].values
+    y_test  = test['popularity'].values
+
+    # 4. 快速确认形状
+    print("X_train shape:", X_train.shape, "y_train shape:", y_train.shape)
+    print("X_dev   shape:", X_dev.shape,   "y_dev   shape:", y_dev.shape)
+    print("X_test  shape:", X_test.shape,  "y_test  shape:", y_test.shape)
+
+    # 打印清洗后的样例
+    print("\nCleaned sample:")
+    print(" ".join(train_tokens.tokens(0)))
+
+    # 打印序列化后的样例
+    print("\nSequence sample:")
+    print(X_train[0])
+
+    save_dir = data_dir
+    np.save(os.path.join(save_dir, 'X_train.npy'), X_train)
+    np.save(os.path.join(save_dir, 'X_dev.npy'),   X_dev)
+    np.save(os.path.join(save_dir, 'X_test.npy'),  X_test)
+    np.save(os.path.join(save_dir, 'y_train.npy'), y_train)
+    np.save(os.path.join(save_dir, 'y_dev.npy'),   y_dev)
+    np.save(os.path.join(save_dir, 'y_test.npy'),  y_test)
+    print("Saved .npy files to Desktop.")
+
+
+# 分词使用多进程：入口放在 main 中，避免子进程（spawn 方式）导入本模块时重复执行
+if __name__ == "__main__":
+    main()
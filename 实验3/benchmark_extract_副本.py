@@ -0,0 +1,160 @@
+"""
+实体抽取吞吐基准：在规模和词表递增的模拟语料上运行各抽取后端（原正则交替、Aho-Corasick 匹配器），
+报告构建耗时、条/秒、MB/秒、峰值内存以及与参照后端的结果一致性，结果写入 JSON 报告。
+
+峰值内存用 tracemalloc 在单独一轮中测量（tracemalloc 本身会拖慢执行，不影响计时轮）。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import time
+import tracemalloc
+
+import numpy as np
+
+from entity_matcher_副本 import BACKENDS
+from generate_dummy_data_副本 import build_vocabularies, generate_records
+
+REPORT_PATH = "results/benchmark_extract.json"
+
+
+def build_corpus(num_records, vocabularies, seed):
+    """生成 num_records 条模拟病例文本"""
+    rng = np.random.default_rng(seed)
+    return [rec["text"] for rec in generate_records(num_records, 0, vocabularies, rng)]
+
+
+def run_backend(backend_cls, vocabularies, texts, time_budget):
+    """
+    计时轮：构建匹配器并依次处理文本，超出 time_budget 秒后提前停止。
+
+    Returns:
+        (构建耗时, 处理耗时, 已处理条数, 每条文本的实体区间集合)
+    """
+    re.purge()  # 清空 re 的编译缓存，否则同一词表第二次构建正则几乎不耗时
+    start = time.perf_counter()
+    matcher = backend_cls(vocabularies)
+    build_seconds = time.perf_counter() - start
+
+    outputs = []
+    start = time.perf_counter()
+    for text in texts:
+        outputs.append({(s.start, s.end, s.type) for s in matcher.find_spans(text)})
+        if time_budget and time.perf_counter() - start > time_budget:
+            break
+    return build_seconds, time.perf_counter() - start, len(outputs), outputs
+
+
+def measure_peak_memory(backend_cls, vocabularies, texts, sample_size):
+    """内存轮：构建匹配器并处理前 sample_size 条文本时的 Python 堆峰值（MB）"""
+    gc.collect()
+    re.purge()
+    tracemalloc.start()
+    try:
+        matcher = backend_cls(vocabularies)
+        for text in texts[:sample_size]:
+            matcher.find_spans(text)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 ** 2
+
+
+def agreement(reference, outputs):
+    """
+    与参照后端的实体区间一致性（只比较双方都处理过的文本）
+
+    Returns:
+        dict: 区间级 precision / recall / f1 以及结果完全相同的文本比例
+    """
+    n = min(len(reference), len(outputs))
+    if n == 0:
+        return None
+    tp = fp = fn = identical = 0
+    for ref, out in zip(reference[:n], outputs[:n]):
+        common = len(ref & out)
+        tp += common
+        fp += len(out) - common
+        fn += len(ref) - common
+        identical += ref == out
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"compared_docs": n, "precision": precision, "recall": recall, "f1": f1,
+            "identical_doc_ratio": identical / n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="实体抽取后端吞吐基准")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS),
+                        help="第一个后端作为一致性参照")
+    parser.add_argument("--num-records", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--vocab-sizes", type=int, nargs="+", default=[5, 1000, 20000],
+                        help="每种实体类型的词条数")
+    parser.add_argument("--time-budget", type=float, default=60.0,
+                        help="每个后端每组配置的处理时间上限（秒），0 表示不限")
+    parser.add_argument("--memory-sample", type=int, default=1000, help="内存轮处理的文本条数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameters": vars(args),
+        "results": [],
+    }
+
+    for vocab_size in args.vocab_sizes:
+        vocabularies = build_vocabularies(vocab_size, seed=args.seed)
+        num_terms = sum(len(v) for v in vocabularies.values())
+        for num_records in args.num_records:
+            texts = build_corpus(num_records, vocabularies, args.seed)
+            corpus_mb = sum(len(t.encode("utf-8")) for t in texts) / 1024 ** 2
+            print(f"\n📊 词表 {num_terms} 条，语料 {num_records} 条（{corpus_mb:.1f} MB）")
+
+            reference = None
+            for name in args.backends:
+                build_seconds, seconds, processed, outputs = run_backend(
+                    BACKENDS[name], vocabularies, texts, args.time_budget)
+                processed_mb = sum(len(t.encode("utf-8")) for t in texts[:processed]) / 1024 ** 2
+                peak_mb = measure_peak_memory(BACKENDS[name], vocabularies, texts, args.memory_sample)
+                if reference is None:
+                    reference = outputs
+
+                result = {
+                    "backend": name,
+                    "vocab_size": vocab_size,
+                    "num_terms": num_terms,
+                    "num_records": num_records,
+                    "processed_records": processed,
+                    "truncated": processed < num_records,
+                    "build_seconds": build_seconds,
+                    "extract_seconds": seconds,
+                    "docs_per_sec": processed / max(seconds, 1e-9),
+                    "mb_per_sec": processed_mb / max(seconds, 1e-9),
+                    "peak_memory_mb": peak_mb,
+                    "num_spans": sum(len(o) for o in outputs),
+                    "agreement": agreement(reference, outputs),
+                }
+                report["results"].append(result)
+
+                f1 = result["agreement"]["f1"] if result["agreement"] else float("nan")
+                note = f"（超时，仅处理 {processed} 条）" if result["truncated"] else ""
+                print(f"  {name:>13}: 构建 {build_seconds:.2f}s，{result['docs_per_sec']:.0f} 条/秒，"
+                      f"{result['mb_per_sec']:.2f} MB/秒，峰值 {peak_mb:.1f} MB，F1 {f1:.4f}{note}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 基准报告已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
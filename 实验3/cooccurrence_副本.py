@@ -0,0 +1,173 @@
+"""
+实体共现分析：从实体区间数据集构建 gene×drug、drug×effect、gene×symptom 等稀疏共现矩阵，
+计算 PMI / lift 并输出得分最高的实体对。
+
+按 record_idx 区间分块读取（利用 Parquet 统计信息跳过无关 row group），每块构建
+记录×实体的 0/1 CSR 矩阵 X_A、X_B，累加 X_Aᵀ·X_B 即得共现计数；内存只与块大小和词表规模有关，
+与记录总数无关。
+
+用法:
+    python cooccurrence_副本.py --spans results/entity_spans --output results/cooccurrence --top 20
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+import scipy.sparse as sp
+
+from entity_writer_副本 import open_span_dataset, read_num_records
+
+DEFAULT_PAIRS = [("gene", "drug"), ("drug", "effect"), ("gene", "symptom")]
+
+
+def scan_terms(dataset, types, batch_size=1_000_000):
+    """
+    第一遍扫描：各类型的实体列表（规范形式，排序后作为矩阵列号）以及最大 record_idx
+    """
+    terms = {t: set() for t in types}
+    max_record = -1
+    for batch in dataset.to_batches(columns=["record_idx", "type", "normalized"],
+                                    filter=pads.field("type").isin(types), batch_size=batch_size):
+        if batch.num_rows == 0:
+            continue
+        max_record = max(max_record, pc.max(batch.column("record_idx")).as_py())
+        table = pa.table({"type": batch.column("type").cast(pa.string()),
+                          "normalized": batch.column("normalized")})
+        for row in table.group_by(["type", "normalized"]).aggregate([]).to_pylist():
+            terms[row["type"]].add(row["normalized"])
+    return {t: pa.array(sorted(v), type=pa.string()) for t, v in terms.items()}, max_record + 1
+
+
+def block_matrices(table, lo, hi, terms):
+    """把 [lo, hi) 区间的实体区间转为每种类型一个 (hi-lo) × |词表| 的 0/1 CSR 矩阵"""
+    matrices = {}
+    types = table.column("type").cast(pa.string())
+    for entity_type, vocabulary in terms.items():
+        rows = table.filter(pc.equal(types, entity_type))
+        record = rows.column("record_idx").to_numpy() - lo
+        column = pc.index_in(rows.column("normalized"), value_set=vocabulary).to_numpy(zero_copy_only=False)
+        matrix = sp.csr_matrix((np.ones(len(record), dtype=np.int32), (record, column)),
+                               shape=(hi - lo, len(vocabulary)))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1  # 同一记录多次提到同一实体只计一次
+        matrices[entity_type] = matrix
+    return matrices
+
+
+def count_cooccurrence(span_root, pairs=DEFAULT_PAIRS, block_records=1_000_000, num_records=None):
+    """
+    分块累加共现计数
+
+    Args:
+        num_records (int): 记录总数（含没有实体的记录）；默认取记录清单，旧版输出没有清单时退回最大 record_idx + 1
+
+    Returns:
+        dict: {"num_records", "terms": {类型: 实体列表}, "doc_freq": {类型: 向量},
+               "counts": {(A, B): CSR 矩阵 |A|×|B|}}
+    """
+    dataset = open_span_dataset(span_root)
+    types = sorted({t for pair in pairs for t in pair})
+    terms, max_records = scan_terms(dataset, types)
+    num_records = num_records or read_num_records(span_root)
+    if num_records is None:
+        print(f"⚠️  {span_root} 没有记录清单，记录总数按最大 record_idx + 1 计算，"
+              f"没有实体的记录不计入 N，lift/PMI 会偏低；请用当前版本重新抽取")
+        num_records = max_records
+    elif num_records < max_records:
+        raise ValueError(f"记录总数 {num_records} 小于实体区间中的最大 record_idx {max_records - 1}")
+
+    doc_freq = {t: np.zeros(len(terms[t]), dtype=np.int64) for t in types}
+    counts = {pair: sp.csr_matrix((len(terms[pair[0]]), len(terms[pair[1]])), dtype=np.int64)
+              for pair in pairs}
+
+    columns = ["record_idx", "type", "normalized"]
+    for lo in range(0, max_records, block_records):
+        hi = min(lo + block_records, max_records)
+        expr = (pads.field("record_idx") >= lo) & (pads.field("record_idx") < hi) & \
+            pads.field("type").isin(types)
+        matrices = block_matrices(dataset.to_table(columns=columns, filter=expr), lo, hi, terms)
+        for t in types:
+            doc_freq[t] += np.asarray(matrices[t].sum(axis=0), dtype=np.int64).ravel()
+        for a, b in pairs:
+            counts[(a, b)] = counts[(a, b)] + (matrices[a].T.tocsr() @ matrices[b]).astype(np.int64)
+
+    return {"num_records": num_records, "terms": {t: v.to_pylist() for t, v in terms.items()},
+            "doc_freq": doc_freq, "counts": counts}
+
+
+def score_pairs(counts, freq_a, freq_b, num_records, min_count=5):
+    """
+    对非零共现计算 lift 和 PMI（对数底 2）：lift = N·c(a,b) / (n(a)·n(b))，PMI = log2(lift)
+
+    Returns:
+        (行号, 列号, 共现数, lift, pmi) 五个数组，只含共现数 ≥ min_count 的实体对
+    """
+    coo = counts.tocoo()
+    keep = coo.data >= min_count
+    rows, cols, c = coo.row[keep], coo.col[keep], coo.data[keep].astype(np.float64)
+    lift = c * num_records / (freq_a[rows].astype(np.float64) * freq_b[cols])
+    return rows, cols, c.astype(np.int64), lift, np.log2(lift)
+
+
+def top_pairs(result, pair, k=20, by="pmi", min_count=5):
+    """某一对类型中得分最高的 k 个实体对"""
+    a, b = pair
+    rows, cols, c, lift, pmi = score_pairs(result["counts"][pair], result["doc_freq"][a],
+                                           result["doc_freq"][b], result["num_records"], min_count)
+    score = pmi if by == "pmi" else lift
+    order = np.argsort(-score, kind="stable")[:k]
+    terms_a, terms_b = result["terms"][a], result["terms"][b]
+    return [{a: terms_a[rows[i]], b: terms_b[cols[i]], "count": int(c[i]),
+             "lift": float(lift[i]), "pmi": float(pmi[i])} for i in order]
+
+
+def save_result(result, output_dir):
+    """共现矩阵存为 .npz，实体列表和文档频数存为 JSON"""
+    os.makedirs(output_dir, exist_ok=True)
+    for (a, b), matrix in result["counts"].items():
+        sp.save_npz(os.path.join(output_dir, f"{a}_{b}.npz"), matrix)
+    with open(os.path.join(output_dir, "terms.json"), "w", encoding="utf-8") as f:
+        json.dump({"num_records": result["num_records"], "terms": result["terms"],
+                   "doc_freq": {t: v.tolist() for t, v in result["doc_freq"].items()}},
+                  f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="实体共现分析（PMI / lift）")
+    parser.add_argument("--spans", default="results/entity_spans")
+    parser.add_argument("--output", default="results/cooccurrence")
+    parser.add_argument("--pairs", nargs="+", default=[f"{a}:{b}" for a, b in DEFAULT_PAIRS],
+                        help="类型对，如 gene:drug drug:effect")
+    parser.add_argument("--block-records", type=int, default=1_000_000, help="每块处理的记录数")
+    parser.add_argument("--num-records", type=int, default=None, help="记录总数，默认取抽取输出的记录清单")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--by", choices=["pmi", "lift"], default="pmi")
+    parser.add_argument("--min-count", type=int, default=5, help="共现数低于该值的实体对不参与排序")
+    args = parser.parse_args()
+
+    pairs = [tuple(p.split(":", 1)) for p in args.pairs]
+    start = time.time()
+    result = count_cooccurrence(args.spans, pairs, args.block_records, args.num_records)
+    print(f"✅ 共现统计完成: {result['num_records']} 条记录，耗时 {time.time() - start:.2f} 秒")
+    save_result(result, args.output)
+
+    report = {}
+    for pair in pairs:
+        a, b = pair
+        report[f"{a}:{b}"] = top = top_pairs(result, pair, k=args.top, by=args.by, min_count=args.min_count)
+        print(f"\n📊 {a} × {b}（{result['counts'][pair].nnz} 个非零实体对）按 {args.by} 排序:")
+        for row in top:
+            print(f"  {row[a]:<24} {row[b]:<24} 共现 {row['count']:>8}  lift {row['lift']:8.2f}  "
+                  f"PMI {row['pmi']:6.2f}")
+    with open(os.path.join(args.output, "top_pairs.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+实体倒排索引：规范化实体 → 压缩、有序的记录序号集合（Roaring 位图结构），
+支持 AND / OR / NOT 组合查询，例如 'EGFR AND osimertinib AND "partial response"'，
+队列查询只需对位图求交/并/差，无需重新扫描全部记录。
+
+用法:
+    python entity_index_副本.py build --spans results/entity_spans --index results/entity_index
+    python entity_index_副本.py query --index results/entity_index 'EGFR AND osimertinib AND NOT progression'
+    # 查询不区分大小写：词表 "HER2\tERBB2" 的规范形式用 ERBB2、gene:ERBB2、erbb2 都能命中
+    python entity_index_副本.py query --index results/entity_index 'gene:ERBB2 OR egfr'
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from entity_writer_副本 import open_span_dataset, read_num_records, read_records
+
+ARRAY_MAX = 4096        # 容器基数超过该值时使用位图容器
+BITMAP_WORDS = 1024     # 位图容器：1024 个 uint64 = 65536 位
+
+
+# ---------------------------------------------------------------------------
+# Roaring 位图：按高 16 位分桶，每桶为有序 uint16 数组或 65536 位的位图
+# ---------------------------------------------------------------------------
+
+def _array_to_bitmap(values):
+    words = np.zeros(BITMAP_WORDS, dtype=np.uint64)
+    values = values.astype(np.uint64)
+    np.bitwise_or.at(words, (values >> np.uint64(6)).astype(np.intp),
+                     np.uint64(1) << (values & np.uint64(63)))
+    return words
+
+
+def _bitmap_to_array(words):
+    bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _bitmap_cardinality(words):
+    return int(np.unpackbits(np.ascontiguousarray(words).view(np.uint8)).sum())
+
+
+def _make_container(values=None, words=None):
+    """按基数选择数组容器或位图容器"""
+    if words is not None:
+        if _bitmap_cardinality(words) <= ARRAY_MAX:
+            return _bitmap_to_array(words)
+        return words
+    if len(values) > ARRAY_MAX:
+        return _array_to_bitmap(values)
+    return values.astype(np.uint16)
+
+
+def _is_bitmap(container):
+    return container.dtype == np.uint64
+
+
+def _container_op(a, b, op):
+    if not _is_bitmap(a) and not _is_bitmap(b):
+        if op == "and":
+            return _make_container(np.intersect1d(a, b, assume_unique=True))
+        if op == "or":
+            return _make_container(np.union1d(a, b))
+        return _make_container(np.setdiff1d(a, b, assume_unique=True))
+    wa = a if _is_bitmap(a) else _array_to_bitmap(a)
+    wb = b if _is_bitmap(b) else _array_to_bitmap(b)
+    if op == "and":
+        return _make_container(words=wa & wb)
+    if op == "or":
+        return _make_container(words=wa | wb)
+    return _make_container(words=wa & ~wb)
+
+
+class RoaringBitmap:
+    """只读的 Roaring 风格压缩位图（32 位无符号整数集合）"""
+
+    def __init__(self, containers=None):
+        self.containers = containers or {}  # {高16位: 容器}
+
+    @classmethod
+    def from_sorted(cls, values):
+        values = np.asarray(values, dtype=np.uint32)
+        if not len(values):
+            return cls()
+        highs = values >> 16
+        bounds = np.flatnonzero(np.diff(highs)) + 1
+        containers = {}
+        for chunk in np.split(values, bounds):
+            containers[int(chunk[0] >> 16)] = _make_container(chunk & 0xFFFF)
+        return cls(containers)
+
+    @classmethod
+    def full_range(cls, n):
+        return cls.from_sorted(np.arange(n, dtype=np.uint32))
+
+    def _combine(self, other, op):
+        result = {}
+        keys = set(self.containers) | set(other.containers) if op == "or" else set(self.containers)
+        for key in sorted(keys):
+            a, b = self.containers.get(key), other.containers.get(key)
+            if b is None:
+                if op != "and":
+                    result[key] = a
+                continue
+            if a is None:
+                result[key] = b
+                continue
+            merged = _container_op(a, b, op)
+            if len(merged) and (not _is_bitmap(merged) or merged.any()):
+                result[key] = merged
+        return RoaringBitmap(result)
+
+    def __and__(self, other):
+        return self._combine(other, "and")
+
+    def __or__(self, other):
+        return self._combine(other, "or")
+
+    def __sub__(self, other):
+        return self._combine(other, "andnot")
+
+    def __len__(self):
+        return sum(_bitmap_cardinality(c) if _is_bitmap(c) else len(c) for c in self.containers.values())
+
+    def to_array(self):
+        parts = []
+        for key in sorted(self.containers):
+            container = self.containers[key]
+            low = _bitmap_to_array(container) if _is_bitmap(container) else container
+            parts.append((np.uint32(key) << np.uint32(16)) | low.astype(np.uint32))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+
+
+# ---------------------------------------------------------------------------
+# 索引构建与存储
+#   containers.npy  所有容器按 uint16 拼接（位图容器视为 4096 个 uint16）
+#   directory.npy   每个容器一行: (term 序号, 高16位, 是否位图, 起始偏移, 长度)
+#   terms.json      term 列表（"类型:规范形式"）、每个 term 的容器区间、记录总数
+#   record_ids.arrow  record_idx → 原始记录 ID
+# 记录总数与全部记录 ID 取自抽取输出的记录清单（含没有实体的记录），NOT 查询以全部记录为全集
+# ---------------------------------------------------------------------------
+
+def build_index(span_root, index_dir, batch_size=1_000_000, num_records=None):
+    """
+    从实体区间数据集构建倒排索引（逐批扫描，只读 record_idx/record_id/type/normalized 四列）
+
+    Args:
+        num_records (int): 记录总数；默认取记录清单，旧版输出没有清单时退回最大 record_idx + 1
+    """
+    start = time.time()
+    dataset = open_span_dataset(span_root)
+    records_table = read_records(span_root)
+    num_records = num_records or read_num_records(span_root)
+    term_codes = {}
+    pair_chunks = []
+    id_chunks = []
+    max_record = -1
+
+    for batch in dataset.to_batches(columns=["record_idx", "record_id", "type", "normalized"],
+                                    batch_size=batch_size):
+        if batch.num_rows == 0:
+            continue
+        # term 统一小写，与查询时的小写化一致（词表规范形式可能带大写，如 gene:ERBB2）
+        keys = pc.utf8_lower(pc.binary_join_element_wise(batch.column("type").cast(pa.string()),
+                                                         batch.column("normalized"), ":"))
+        encoded = pc.dictionary_encode(keys)
+        local_terms = encoded.dictionary.to_pylist()
+        remap = np.array([term_codes.setdefault(t, len(term_codes)) for t in local_terms], dtype=np.int64)
+        codes = remap[encoded.indices.to_numpy()]
+        records = batch.column("record_idx").to_numpy()
+        pair_chunks.append(np.stack([codes, records]))
+        if records_table is None:
+            id_chunks.append((records, batch.column("record_id")))
+        max_record = max(max_record, int(records.max()))
+
+    if num_records is None:
+        print(f"⚠️  {span_root} 没有记录清单，记录总数按最大 record_idx + 1 计算，"
+              f"没有实体的记录不会出现在 NOT 查询结果中；请用当前版本重新抽取")
+        num_records = max_record + 1
+    elif num_records <= max_record:
+        raise ValueError(f"记录总数 {num_records} 小于实体区间中的最大 record_idx {max_record}")
+    terms = list(term_codes)
+    pairs = np.concatenate(pair_chunks, axis=1) if pair_chunks else np.zeros((2, 0), dtype=np.int64)
+    order = np.lexsort((pairs[1], pairs[0]))
+    pairs = pairs[:, order]
+    keep = np.ones(pairs.shape[1], dtype=bool)
+    keep[1:] = (np.diff(pairs[0]) != 0) | (np.diff(pairs[1]) != 0)
+    pairs = pairs[:, keep]
+
+    # 按 term 切分并生成位图
+    blocks, directory, term_ranges = [], [], []
+    offset = 0
+    term_bounds = np.flatnonzero(np.diff(pairs[0])) + 1
+    for segment in np.split(np.arange(pairs.shape[1]), term_bounds) if pairs.shape[1] else []:
+        term = int(pairs[0, segment[0]])
+        bitmap = RoaringBitmap.from_sorted(pairs[1, segment])
+        first = len(directory)
+        for high in sorted(bitmap.containers):
+            container = bitmap.containers[high]
+            data = container.view(np.uint16) if _is_bitmap(container) else container
+            directory.append((term, high, int(_is_bitmap(container)), offset, len(data)))
+            blocks.append(data)
+            offset += len(data)
+        term_ranges.append((term, first, len(directory)))
+
+    ranges = {terms[t]: [first, last] for t, first, last in term_ranges}
+
+    # record_idx → 原始 ID（优先取记录清单，包含没有实体的记录）
+    record_ids = [None] * num_records
+    if records_table is not None:
+        id_chunks = [(records_table.column("record_idx").to_numpy(), records_table.column("record_id"))]
+    for records, ids in id_chunks:
+        for idx, rid in zip(records.tolist(), ids.to_pylist()):
+            if idx < num_records:
+                record_ids[idx] = rid
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, "containers.npy"),
+            np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.uint16))
+    np.save(os.path.join(index_dir, "directory.npy"),
+            np.array(directory, dtype=np.int64).reshape(-1, 5))
+    with open(os.path.join(index_dir, "terms.json"), "w", encoding="utf-8") as f:
+        json.dump({"num_records": num_records, "terms": ranges}, f, ensure_ascii=False)
+    table = pa.table({"record_id": pa.array(record_ids, type=pa.string())})
+    with pa.OSFile(os.path.join(index_dir, "record_ids.arrow"), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    print(f"✅ 索引已保存到 {index_dir}: {len(terms)} 个实体, {num_records} 条记录, "
+          f"{offset * 2 / 1024 / 1024:.1f} MB, 耗时 {time.time() - start:.2f} 秒")
+
+
+class EntityIndex:
+    """内存映射打开的倒排索引，支持布尔查询"""
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, "terms.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.num_records = meta["num_records"]
+        self.terms = meta["terms"]
+        self._containers = np.load(os.path.join(index_dir, "containers.npy"), mmap_mode="r")
+        self._directory = np.load(os.path.join(index_dir, "directory.npy"), mmap_mode="r")
+        self._record_ids_path = os.path.join(index_dir, "record_ids.arrow")
+        self._record_ids = None
+        # 小写查询词 → term（旧版索引中的 term 可能带大写）；不带类型前缀的查询词 → 所有类型下的 term
+        self._by_term, self._by_name = {}, {}
+        for term in self.terms:
+            self._by_term.setdefault(term.lower(), []).append(term)
+            self._by_name.setdefault(term.split(":", 1)[1].lower(), []).append(term)
+
+    def postings(self, term):
+        """返回某个 term（"类型:规范形式"，或不带类型的规范形式；不区分大小写）的位图"""
+        term = term.lower()
+        keys = self._by_term.get(term) or self._by_name.get(term, [])
+        result = RoaringBitmap()
+        for key in keys:
+            first, last = self.terms[key]
+            containers = {}
+            for _, high, is_bitmap, offset, length in self._directory[first:last]:
+                data = np.asarray(self._containers[offset:offset + length])
+                containers[int(high)] = data.view(np.uint64) if is_bitmap else data
+            result = result | RoaringBitmap(containers)
+        return result
+
+    def query(self, expression):
+        """执行布尔查询，返回命中记录的 record_idx（升序）"""
+        return _QueryParser(expression, self).parse().to_array()
+
+    def record_ids(self, record_indices):
+        if self._record_ids is None:
+            source = pa.memory_map(self._record_ids_path, "r")
+            self._record_ids = pa.ipc.open_file(source).read_all().column("record_id")
+        return self._record_ids.take(pa.array(record_indices, type=pa.int64())).to_pylist()
+
+
+class _QueryParser:
+    """递归下降解析：优先级 NOT > AND > OR，支持括号和带引号的多词实体"""
+
+    _TOKEN = re.compile(r'\s*(\(|\)|"[^"]*"|[^\s()"]+)')
+
+    def __init__(self, expression, index):
+        self.tokens = self._TOKEN.findall(expression)
+        self.pos = 0
+        self.index = index
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        result = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"查询语法错误，多余的内容: {' '.join(self.tokens[self.pos:])}")
+        return result
+
+    def _or(self):
+        result = self._and()
+        while self._peek() and self._peek().upper() == "OR":
+            self._next()
+            result = result | self._and()
+        return result
+
+    def _and(self):
+        result = self._not()
+        while self._peek() and self._peek().upper() == "AND":
+            self._next()
+            result = result & self._not()
+        return result
+
+    def _not(self):
+        if self._peek() and self._peek().upper() == "NOT":
+            self._next()
+            return RoaringBitmap.full_range(self.index.num_records) - self._not()
+        return self._atom()
+
+    def _atom(self):
+        token = self._next()
+        if token is None:
+            raise ValueError("查询语法错误：表达式不完整")
+        if token == "(":
+            result = self._or()
+            if self._next() != ")":
+                raise ValueError("查询语法错误：缺少右括号")
+            return result
+        # 连续的普通单词视为一个多词实体（如 partial response）
+        words = [token.strip('"')]
+        while self._peek() and self._peek() not in ("(", ")") and \
+                self._peek().upper() not in ("AND", "OR", "NOT") and not token.startswith('"'):
+            words.append(self._next().strip('"'))
+        return self.index.postings(" ".join(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="实体倒排索引")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--spans", default="results/entity_spans")
+    build.add_argument("--index", default="results/entity_index")
+    build.add_argument("--num-records", type=int, default=None, help="记录总数，默认取抽取输出的记录清单")
+    query = sub.add_parser("query")
+    query.add_argument("--index", default="results/entity_index")
+    query.add_argument("--limit", type=int, default=20)
+    query.add_argument("expression")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.spans, args.index, num_records=args.num_records)
+        return
+
+    index = EntityIndex(args.index)
+    start = time.time()
+    hits = index.query(args.expression)
+    elapsed = (time.time() - start) * 1000
+    print(f"🔍 {args.expression}: {len(hits)} 条记录（{elapsed:.2f} ms）")
+    for rid in index.record_ids(hits[:args.limit].astype(np.int64)):
+        print(" ", rid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+实体区间的 Parquet 输出：每个实体区间一行（记录序号、记录 ID、类型、原文片段、规范形式、起止偏移），
+按实体类型分区写入 Parquet 数据集，下游可直接做列式、向量化的连接和聚合，无需再拆分 "|" 拼接的字符串。
+
+另外写出记录清单：_records/ 下每条输入记录一行（含没有实体的记录），_manifest.json 保存记录总数，
+NOT 查询、共现统计等需要"全部记录"的场景以此为全集。以 "_" 开头的文件不会被实体区间数据集扫描到。
+"""
+import json
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+
+SPAN_SCHEMA = pa.schema([
+    ("record_idx", pa.int64()),   # 记录在输入中的序号（从 0 开始），便于位图索引和分块统计
+    ("record_id", pa.string()),   # 原始记录 ID
+    ("type", pa.string()),
+    ("surface", pa.string()),
+    ("normalized", pa.string()),
+    ("start", pa.int32()),
+    ("end", pa.int32()),
+])
+
+PARTITION_COLS = ["type"]
+
+RECORD_SCHEMA = pa.schema([
+    ("record_idx", pa.int64()),
+    ("record_id", pa.string()),
+])
+RECORDS_DIR = "_records"
+MANIFEST_FILE = "_manifest.json"
+
+
+class SpanWriter:
+    """缓冲实体区间，累计到 rows_per_flush 行后写出一批分区文件"""
+
+    def __init__(self, root, rows_per_flush=500_000, overwrite=True, part_prefix="part"):
+        self.root = root
+        self.rows_per_flush = rows_per_flush
+        self.part_prefix = part_prefix
+        self.rows_written = 0
+        self.num_records = 0
+        self._part = 0
+        self._reset_buffer()
+        if overwrite and os.path.exists(root):
+            shutil.rmtree(root)
+        os.makedirs(os.path.join(root, RECORDS_DIR), exist_ok=True)
+
+    def _reset_buffer(self):
+        self._buffer = {name: [] for name in SPAN_SCHEMA.names}
+        self._records = {name: [] for name in RECORD_SCHEMA.names}
+
+    def add(self, record_idx, record_id, spans):
+        """
+        添加一条记录的全部实体区间；没有实体的记录也要调用，以便写入记录清单
+
+        Args:
+            spans: Span 或具有 start/end/type/surface/normalized 键的 dict 列表
+        """
+        buf = self._buffer
+        record_id = None if record_id is None else str(record_id)
+        self._records["record_idx"].append(record_idx)
+        self._records["record_id"].append(record_id)
+        self.num_records = max(self.num_records, record_idx + 1)
+        for span in spans:
+            if isinstance(span, dict):
+                start, end, entity_type = span["start"], span["end"], span["type"]
+                surface, normalized = span["surface"], span["normalized"]
+            else:
+                start, end, entity_type, surface, normalized = span
+            buf["record_idx"].append(record_idx)
+            buf["record_id"].append(record_id)
+            buf["type"].append(entity_type)
+            buf["surface"].append(surface)
+            buf["normalized"].append(normalized)
+            buf["start"].append(start)
+            buf["end"].append(end)
+        if max(len(buf["record_idx"]), len(self._records["record_idx"])) >= self.rows_per_flush:
+            self.flush()
+
+    def flush(self):
+        if not self._records["record_idx"]:
+            return
+        if self._buffer["record_idx"]:
+            table = pa.Table.from_pydict(self._buffer, schema=SPAN_SCHEMA)
+            pq.write_to_dataset(
+                table,
+                self.root,
+                partition_cols=PARTITION_COLS,
+                basename_template=f"{self.part_prefix}-{self._part:05d}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            self.rows_written += table.num_rows
+        records = pa.Table.from_pydict(self._records, schema=RECORD_SCHEMA)
+        pq.write_table(records, os.path.join(self.root, RECORDS_DIR,
+                                             f"{self.part_prefix}-{self._part:05d}.parquet"))
+        self._part += 1
+        self._reset_buffer()
+
+    def close(self):
+        self.flush()
+        write_manifest(self.root, self.num_records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+def write_manifest(root, num_records):
+    """写出记录总数；最后写入，存在即表示输出完整"""
+    path = os.path.join(root, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"num_records": num_records}, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_num_records(root):
+    """记录总数（含没有实体的记录）；旧版输出没有清单时返回 None"""
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["num_records"]
+
+
+def read_records(root):
+    """记录清单（record_idx、record_id 两列，按 record_idx 排序）；没有清单时返回 None"""
+    records_dir = os.path.join(root, RECORDS_DIR)
+    if not os.path.isdir(records_dir):
+        return None
+    table = pads.dataset(records_dir, format="parquet", schema=RECORD_SCHEMA).to_table()
+    return table.sort_by("record_idx")
+
+
+def read_spans(root, columns=None, filter=None):
+    """读取实体区间数据集（分区列 type 会被还原为普通列）"""
+    return open_span_dataset(root).to_table(columns=columns, filter=filter)
+
+
+def open_span_dataset(root):
+    """以 pyarrow.dataset 打开实体区间数据集，可按批扫描、按列投影和过滤"""
+    return pads.dataset(root, format="parquet", partitioning="hive")
@@ -0,0 +1,139 @@
+"""
+全量实体抽取：datasets.map(batched=True, num_proc=N) 并行处理整个 Open-Patients 数据集，
+结果按批写入按类型分区的 Parquet 数据集（每个实体区间一行），并报告吞吐（条/秒）。
+输入为 .parquet 时直接逐 row group 流式读取，由进程池处理，不经过 JSON 转换和 datasets 缓存。
+"""
+import argparse
+import os
+import time
+from collections import deque
+from functools import partial
+from multiprocessing import Pool
+
+from datasets import load_dataset
+
+from entity_matcher_副本 import build_matcher
+from parquet_reader_副本 import iter_record_batches, count_rows, resolve_columns
+from entity_writer_副本 import SpanWriter
+
+# 每个工作进程只构建一次匹配器（大词表构建自动机代价较高）
+_MATCHERS = {}
+
+
+def _get_matcher(vocab_dir):
+    if vocab_dir not in _MATCHERS:
+        _MATCHERS[vocab_dir] = build_matcher(vocab_dir)
+    return _MATCHERS[vocab_dir]
+
+
+def extract_batch(batch, text_column, vocab_dir):
+    """批处理函数：为每条记录生成实体区间列表和实体数"""
+    matcher = _get_matcher(vocab_dir)
+    spans, counts = [], []
+    for text in batch[text_column]:
+        found = matcher.find_spans(text or "")
+        spans.append([span._asdict() for span in found])
+        counts.append(len(found))
+    return {"entities": spans, "num_entities": counts}
+
+
+def extract_record_batch(batch, vocab_dir):
+    """处理一个 ("id", "text") RecordBatch，返回 [(id, 实体区间列表), ...]"""
+    matcher = _get_matcher(vocab_dir)
+    ids = batch.column(0).to_pylist()
+    texts = batch.column(1).to_pylist()
+    return [(rid, [span._asdict() for span in matcher.find_spans(text or "")])
+            for rid, text in zip(ids, texts)]
+
+
+def bounded_imap(pool, func, iterable, max_pending):
+    """
+    有序的 imap，但最多只有 max_pending 个批次在途
+    （Pool.imap 会一次性读完输入迭代器，数据集很大时内存不受控）
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def run_parquet(args):
+    """parquet 输入：流式读取 RecordBatch，进程池抽取，边处理边写出"""
+    total = count_rows(args.data_files)
+    print(f"✅ {args.data_files}: {total} 条记录（流式读取）")
+
+    start = time.time()
+    records = num_entities = 0
+    batches = iter_record_batches(args.data_files, text_column=args.text_column,
+                                  batch_size=args.batch_size)
+    worker = partial(extract_record_batch, vocab_dir=args.vocab_dir)
+    with Pool(args.num_proc) as pool, SpanWriter(args.output) as writer:
+        for results in bounded_imap(pool, worker, batches, max_pending=2 * args.num_proc):
+            for rid, spans in results:
+                writer.add(records, rid, spans)
+                num_entities += len(spans)
+                records += 1
+            elapsed = time.time() - start
+            print(f"  进度: {records}/{total}（{records / max(elapsed, 1e-9):.0f} 条/秒）")
+
+    total_seconds = time.time() - start
+    print(f"✅ 结果已保存到 {args.output}")
+    print(f"  记录数: {records}，实体数: {num_entities}")
+    print(f"  总耗时: {total_seconds:.2f} 秒（{records / max(total_seconds, 1e-9):.0f} 条/秒）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-Patients 全量实体抽取")
+    parser.add_argument("--data-files", default="data/open-patients/train.jsonl")
+    parser.add_argument("--format", default="json", help="load_dataset 的数据格式（json / parquet）")
+    parser.add_argument("--text-column", default=None, help="默认自动识别（text / description）")
+    parser.add_argument("--vocab-dir", default="data/vocab")
+    parser.add_argument("--num-proc", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", default="results/entity_spans", help="按实体类型分区的 Parquet 数据集目录")
+    args = parser.parse_args()
+
+    if args.data_files.endswith(".parquet"):
+        run_parquet(args)
+        return
+
+    ds = load_dataset(args.format, data_files=args.data_files, split="train")
+    # 文本列与 ID 列与 parquet 输入相同：未指定时按 parquet_reader 中的候选列表自动识别
+    args.text_column, id_column = resolve_columns(ds.column_names, args.text_column)
+    print(f"✅ 加载 {len(ds)} 条记录，文本列: {args.text_column}，ID列: {id_column}")
+
+    start = time.time()
+    result = ds.map(
+        extract_batch,
+        batched=True,
+        batch_size=args.batch_size,
+        num_proc=args.num_proc,
+        fn_kwargs={"text_column": args.text_column, "vocab_dir": args.vocab_dir},
+        remove_columns=[c for c in ds.column_names if c != id_column],
+        desc="抽取实体",
+    )
+    extract_seconds = time.time() - start
+
+    # 从 Arrow 缓存按批读出并写入分区 Parquet，不在内存中拼接全部结果
+    num_entities = 0
+    with SpanWriter(args.output) as writer:
+        record_idx = 0
+        for batch in result.iter(batch_size=args.batch_size):
+            ids = batch[id_column] if id_column else range(record_idx, record_idx + len(batch["entities"]))
+            for rid, spans in zip(ids, batch["entities"]):
+                writer.add(record_idx, rid, spans)
+                num_entities += len(spans)
+                record_idx += 1
+    total_seconds = time.time() - start
+
+    print(f"✅ 结果已保存到 {args.output}")
+    print(f"  记录数: {len(result)}，实体数: {num_entities}")
+    print(f"  抽取耗时: {extract_seconds:.2f} 秒（{len(result) / max(extract_seconds, 1e-9):.0f} 条/秒）")
+    print(f"  总耗时（含写出）: {total_seconds:.2f} 秒（{len(result) / max(total_seconds, 1e-9):.0f} 条/秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,17 @@
-import json, re
+import json
 from datasets import load_dataset
 
+from entity_matcher_副本 import build_matcher
+
 # 1. 加载数据
 ds = load_dataset("json", data_files="data/open-patients/train.jsonl", split="train")
 
 # 2. 简易规则提取（演示用）
-patterns = {
-    "gene":     r"\b(?:BRCA1|TP53|EGFR|KRAS|ALK)\b",
-    "drug":     r"\b(?:imatinib|osimertinib|crizotinib|trametinib|lapatinib)\b",
-    "symptom":  r"\b(?:lung cancer|breast cancer|colorectal cancer|melanoma|glioblastoma)\b",
-    "effect":   r"\b(?:partial response|stable disease|progression|complete response|mild improvement)\b"
-}
+# 词典匹配（Aho-Corasick，一次扫描匹配全部类型）；词表见 data/vocab/<类型>.txt，缺失时使用默认词表
+matcher = build_matcher("data/vocab")
 
 def extract(text):
-    return {k: re.findall(v, text, flags=re.I) for k, v in patterns.items()}
+    return matcher.extract(text)
 
 # 3. 处理前 5 条并打印
 for i in range(5):
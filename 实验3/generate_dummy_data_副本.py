@@ -1,23 +1,240 @@
-import json, os, gzip
-
-os.makedirs("data/open-patients", exist_ok=True)
-
-# 100 条模拟病例（含基因/药物/症状/效果）
-records = [
-    {
-        "id": i,
-        "text": f"Patient with {gene} mutation was treated with {drug} for {symptom}. Outcome: {effect}."
-    }
-    for i, (gene, drug, symptom, effect) in enumerate(zip(
-        ["BRCA1", "TP53", "EGFR", "KRAS", "ALK"] * 20,
-        ["imatinib", "osimertinib", "crizotinib", "trametinib", "lapatinib"] * 20,
-        ["lung cancer", "breast cancer", "colorectal cancer", "melanoma", "glioblastoma"] * 20,
-        ["partial response", "stable disease", "progression", "complete response", "mild improvement"] * 20
-    ))
-]
-
-with open("data/open-patients/train.jsonl", "w", encoding="utf-8") as f:
-    for rec in records:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-print("✅ 已生成 data/open-patients/train.jsonl（100条样本）")
+"""
+可扩展的模拟病例生成器（压测用）
+- 词表规模、实体密度、文本长度、Zipf 词频均可配置
+- 输出 gzip 压缩的 JSONL 分片或 Parquet 分片，多进程并行写出
+- 给定种子时结果可复现（每个分片使用独立的子随机流，与进程数无关）
+- 指定 --vocab-size 时生成随机文本，并把词表写到 data/vocab/<类型>.txt，供词典匹配器直接加载
+
+不指定 --vocab-size 时使用原脚本的模板句和演示词条（不写词表文件），
+默认参数的输出与原脚本一致：100 条样本写到 data/open-patients/train.jsonl
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import time
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from entity_matcher_副本 import DEFAULT_VOCABULARIES, ENTITY_TYPES
+
+OUTPUT_DIR = "data/open-patients"
+VOCAB_DIR = "data/vocab"
+
+# 生成词条用的片段
+_DRUG_STEMS = ["ima", "osi", "cri", "tra", "lapa", "erlo", "gefi", "afa", "dabra", "vemu", "sora", "suni",
+               "pazo", "axi", "cabo", "lenva", "rego", "nilo", "dasa", "bosu", "pona", "ibru", "acala", "zanu"]
+_DRUG_SUFFIXES = ["tinib", "mertinib", "zotinib", "metinib", "fenib", "parib", "lisib", "ciclib", "mab", "zumab"]
+_ORGANS = ["lung", "breast", "colorectal", "gastric", "pancreatic", "ovarian", "prostate", "renal", "bladder",
+           "thyroid", "hepatic", "esophageal", "cervical", "endometrial", "oral", "skin", "bone", "brain"]
+_DISEASES = ["cancer", "carcinoma", "adenocarcinoma", "sarcoma", "lymphoma", "neoplasm", "metastasis", "tumor"]
+_QUALIFIERS = ["mild", "marked", "partial", "complete", "transient", "sustained", "early", "late", "minor",
+               "durable", "rapid", "slow"]
+_OUTCOMES = ["response", "improvement", "remission", "progression", "stable disease", "relapse", "recurrence",
+             "toxicity", "deterioration"]
+_FILLER = ["patient", "was", "with", "the", "and", "of", "history", "presented", "treated", "after", "mutation",
+           "therapy", "cycles", "months", "follow", "up", "showed", "reported", "dose", "daily", "years", "old",
+           "male", "female", "admitted", "clinic", "scan", "revealed", "biopsy", "confirmed", "outcome", "noted",
+           "symptoms", "initial", "diagnosis", "received", "line", "second", "first", "imaging", "weeks"]
+
+
+def _letters(rng, n):
+    return "".join(chr(ord("A") + i) for i in rng.integers(0, 26, size=n))
+
+
+def _make_gene(rng):
+    return _letters(rng, int(rng.integers(2, 5))) + str(int(rng.integers(1, 30)))
+
+
+def _make_drug(rng):
+    return _DRUG_STEMS[rng.integers(len(_DRUG_STEMS))] + _letters(rng, int(rng.integers(0, 3))).lower() + \
+        _DRUG_SUFFIXES[rng.integers(len(_DRUG_SUFFIXES))]
+
+
+def _make_symptom(rng):
+    words = [_ORGANS[rng.integers(len(_ORGANS))], _DISEASES[rng.integers(len(_DISEASES))]]
+    if rng.random() < 0.5:
+        words.insert(0, _ORGANS[rng.integers(len(_ORGANS))] + _letters(rng, 2).lower())
+    return " ".join(words)
+
+
+def _make_effect(rng):
+    words = [_QUALIFIERS[rng.integers(len(_QUALIFIERS))], _OUTCOMES[rng.integers(len(_OUTCOMES))]]
+    if rng.random() < 0.5:
+        words.insert(0, _QUALIFIERS[rng.integers(len(_QUALIFIERS))] + _letters(rng, 2).lower())
+    return " ".join(words)
+
+
+_MAKERS = {"gene": _make_gene, "drug": _make_drug, "symptom": _make_symptom, "effect": _make_effect}
+
+
+def build_vocabularies(vocab_size, seed=42):
+    """
+    生成每种实体类型的词表（前几个词条为原演示词条，保证与默认正则兼容）
+
+    Args:
+        vocab_size (int): 每种类型的词条数
+    """
+    rng = np.random.default_rng(seed)
+    vocabularies = {}
+    for entity_type in ENTITY_TYPES:
+        terms = list(DEFAULT_VOCABULARIES[entity_type])[:vocab_size]
+        seen = {t.lower() for t in terms}
+        attempts = 0
+        while len(terms) < vocab_size and attempts < vocab_size * 50:
+            attempts += 1
+            term = _MAKERS[entity_type](rng)
+            if term.lower() not in seen:
+                seen.add(term.lower())
+                terms.append(term)
+        vocabularies[entity_type] = terms
+    return vocabularies
+
+
+def write_vocabularies(vocabularies, vocab_dir=VOCAB_DIR):
+    os.makedirs(vocab_dir, exist_ok=True)
+    for entity_type, terms in vocabularies.items():
+        with open(os.path.join(vocab_dir, f"{entity_type}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(terms) + "\n")
+
+
+def _zipf_cdf(n, a):
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    return np.cumsum(weights / weights.sum())
+
+
+def generate_records(num_records, start_id, vocabularies, rng, min_words=20, max_words=120,
+                     entity_density=0.05, zipf_a=1.1):
+    """
+    逐条生成模拟病例
+
+    Args:
+        entity_density (float): 平均每个词位置出现实体的概率
+        zipf_a (float): Zipf 指数，越大词频越集中在头部词条
+    """
+    types = list(vocabularies)
+    term_cdfs = {t: _zipf_cdf(len(vocabularies[t]), zipf_a) for t in types}
+    filler_cdf = _zipf_cdf(len(_FILLER), zipf_a)
+
+    for offset in range(num_records):
+        length = int(rng.integers(min_words, max_words + 1))
+        words = [_FILLER[i] for i in np.searchsorted(filler_cdf, rng.random(length))]
+        num_entities = min(length, int(rng.poisson(entity_density * length)))
+        if num_entities:
+            positions = rng.permutation(length)[:num_entities]
+            chosen_types = rng.integers(len(types), size=num_entities)
+            draws = rng.random(num_entities)
+            for pos, type_idx, draw in zip(positions.tolist(), chosen_types.tolist(), draws.tolist()):
+                terms = vocabularies[types[type_idx]]
+                term_idx = min(int(term_cdfs[types[type_idx]].searchsorted(draw)), len(terms) - 1)
+                words[pos] = terms[term_idx]
+        # 约每 12 个词一个句号
+        for pos in range(11, length - 1, 12):
+            words[pos] += "."
+        text = " ".join(words)
+        yield {"id": start_id + offset, "text": text[0].upper() + text[1:] + "."}
+
+
+# 原脚本的模板句：第 i 条记录依次使用各类演示词条的第 i % 5 个
+TEMPLATE = "Patient with {gene} mutation was treated with {drug} for {symptom}. Outcome: {effect}."
+
+
+def generate_template_records(num_records, start_id):
+    """逐条生成原脚本的模板病例（不使用随机数）"""
+    columns = [DEFAULT_VOCABULARIES[t] for t in ("gene", "drug", "symptom", "effect")]
+    for record_id in range(start_id, start_id + num_records):
+        gene, drug, symptom, effect = (terms[record_id % len(terms)] for terms in columns)
+        yield {"id": record_id, "text": TEMPLATE.format(gene=gene, drug=drug, symptom=symptom, effect=effect)}
+
+
+def _shard_path(output_dir, shard, num_shards, fmt):
+    suffix = {"jsonl": "jsonl", "jsonl.gz": "jsonl.gz", "parquet": "parquet"}[fmt]
+    if num_shards == 1 and fmt == "jsonl":
+        return os.path.join(output_dir, "train.jsonl")  # 与各加载脚本的默认路径一致
+    return os.path.join(output_dir, f"train-{shard:05d}-of-{num_shards:05d}.{suffix}")
+
+
+def write_shard(shard, seed_seq, shard_sizes, vocabularies, args):
+    """生成并写出一个分片（在工作进程中运行）"""
+    start_id = int(sum(shard_sizes[:shard]))
+    if vocabularies is None:
+        records = generate_template_records(shard_sizes[shard], start_id)
+    else:
+        records = generate_records(shard_sizes[shard], start_id, vocabularies, np.random.default_rng(seed_seq),
+                                   min_words=args.min_words, max_words=args.max_words,
+                                   entity_density=args.entity_density, zipf_a=args.zipf_a)
+    path = _shard_path(args.output_dir, shard, len(shard_sizes), args.format)
+    tmp_path = path + ".tmp"
+
+    if args.format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.schema([("id", pa.int64()), ("text", pa.string())])
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            batch = []
+            for rec in records:
+                batch.append(rec)
+                if len(batch) >= 50_000:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    else:
+        with open(tmp_path, "wb") as raw:
+            if args.format == "jsonl.gz":
+                # mtime=0 使 gzip 头部固定，相同种子生成的文件逐字节一致；头部文件名取最终文件名而非 .tmp
+                raw = gzip.GzipFile(filename=os.path.basename(path)[:-len(".gz")], mode="wb", fileobj=raw, mtime=0)
+            with io.TextIOWrapper(raw, encoding="utf-8") as f:
+                for rec in records:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    os.replace(tmp_path, path)
+    return path, shard_sizes[shard]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成模拟病例数据")
+    parser.add_argument("--num-records", type=int, default=100)
+    parser.add_argument("--num-shards", type=int, default=1)
+    parser.add_argument("--format", choices=["jsonl", "jsonl.gz", "parquet"], default="jsonl")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--vocab-dir", default=VOCAB_DIR)
+    parser.add_argument("--vocab-size", type=int, default=None,
+                        help="每种实体类型的词条数；指定后生成随机文本并写出词表，默认使用原脚本的模板句")
+    parser.add_argument("--entity-density", type=float, default=0.05)
+    parser.add_argument("--min-words", type=int, default=20)
+    parser.add_argument("--max-words", type=int, default=120)
+    parser.add_argument("--zipf-a", type=float, default=1.1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.time()
+
+    vocabularies = None
+    if args.vocab_size is not None:
+        vocabularies = build_vocabularies(args.vocab_size, seed=args.seed)
+        write_vocabularies(vocabularies, args.vocab_dir)
+        print(f"📚 词表已写入 {args.vocab_dir}：" +
+              "，".join(f"{t} {len(v)} 条" for t, v in vocabularies.items()))
+
+    base, extra = divmod(args.num_records, args.num_shards)
+    shard_sizes = [base + (1 if i < extra else 0) for i in range(args.num_shards)]
+    seeds = np.random.SeedSequence(args.seed).spawn(args.num_shards)
+    worker = partial(write_shard, shard_sizes=shard_sizes, vocabularies=vocabularies, args=args)
+
+    with Pool(min(args.workers, args.num_shards)) as pool:
+        for path, count in pool.starmap(worker, [(i, seeds[i]) for i in range(args.num_shards)]):
+            print(f"  ✅ {path}（{count} 条）")
+
+    elapsed = time.time() - start
+    print(f"✅ 已生成 {args.num_records} 条样本，{args.num_shards} 个分片，"
+          f"耗时 {elapsed:.1f} 秒（{args.num_records / max(elapsed, 1e-9):.0f} 条/秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Open-Patients parquet 流式读取：逐个 row group 读取，只投影 ID 列和文本列，
+以 Arrow RecordBatch 形式交给抽取程序，无需先转换为 JSONL 或构建 datasets 缓存。
+启动时间和内存占用与数据集大小无关。
+"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARQUET_PATH = "data/open-patients/train-00000-of-00001.parquet"
+
+# 按顺序尝试的列名（Open-Patients 使用 _id / description，本地模拟数据使用 id / text，
+# record_id 为本项目输出中的记录 ID 列）；各抽取入口共用这两个候选列表
+TEXT_COLUMNS = ("text", "description")
+ID_COLUMNS = ("id", "_id", "record_id")
+
+
+def resolve_columns(column_names, text_column=None, id_column=None):
+    """确定文本列和 ID 列（未指定时按候选列表自动识别）"""
+    if text_column is None:
+        text_column = next((c for c in TEXT_COLUMNS if c in column_names), None)
+    if id_column is None:
+        id_column = next((c for c in ID_COLUMNS if c in column_names), None)
+    if text_column not in column_names:
+        raise ValueError(f"找不到文本列，现有列: {column_names}")
+    return text_column, id_column
+
+
+def iter_record_batches(path=PARQUET_PATH, text_column=None, id_column=None, batch_size=10_000):
+    """
+    逐 row group 读取 parquet，产出列名统一为 ("id", "text") 的 RecordBatch。
+
+    没有 ID 列时使用全局行号作为 ID。
+    """
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    text_column, id_column = resolve_columns(parquet_file.schema_arrow.names, text_column, id_column)
+    columns = [text_column] + ([id_column] if id_column else [])
+
+    offset = 0
+    for group in range(parquet_file.num_row_groups):
+        table = parquet_file.read_row_group(group, columns=columns)
+        for batch in table.to_batches(max_chunksize=batch_size):
+            if id_column:
+                ids = batch.column(id_column)
+            else:
+                ids = pa.array(range(offset, offset + batch.num_rows), type=pa.int64())
+            offset += batch.num_rows
+            yield pa.RecordBatch.from_arrays([ids, batch.column(text_column)], names=["id", "text"])
+
+
+def count_rows(path=PARQUET_PATH):
+    """只读文件元数据获取行数"""
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+if __name__ == "__main__":
+    parquet_file = pq.ParquetFile(PARQUET_PATH)
+    print(f"✅ {PARQUET_PATH}: {parquet_file.metadata.num_rows} 条样本，{parquet_file.num_row_groups} 个 row group")
+    print("列:", parquet_file.schema_arrow.names)
+    first = next(iter_record_batches(PARQUET_PATH, batch_size=1))
+    print("第一条样本：")
+    print(first.to_pylist()[0])
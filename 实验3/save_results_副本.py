@@ -1,17 +1,15 @@
-import re,json, csv, os
+import json, csv, os
 from datasets import load_dataset
 
+from entity_matcher_副本 import build_matcher
+
 ds = load_dataset("json", data_files="data/open-patients/train.jsonl", split="train")
 
-patterns = {
-    "gene":     r"\b(?:BRCA1|TP53|EGFR|KRAS|ALK)\b",
-    "drug":     r"\b(?:imatinib|osimertinib|crizotinib|trametinib|lapatinib)\b",
-    "symptom":  r"\b(?:lung cancer|breast cancer|colorectal cancer|melanoma|glioblastoma)\b",
-    "effect":   r"\b(?:partial response|stable disease|progression|complete response|mild improvement)\b"
-}
+# 词典匹配（Aho-Corasick，一次扫描匹配全部类型）；词表见 data/vocab/<类型>.txt，缺失时使用默认词表
+matcher = build_matcher("data/vocab")
 
 def extract(text):
-    return {k: "|".join(re.findall(v, text, flags=re.I)) for k, v in patterns.items()}
+    return {k: "|".join(v) for k, v in matcher.extract(text).items()}
 
 os.makedirs("results", exist_ok=True)
 with open("results/extracted_entities.csv", "w", newline='', encoding='utf-8') as f:
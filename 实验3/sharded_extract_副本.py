@@ -0,0 +1,214 @@
+"""
+分片、可续跑的实体抽取（大型 JSONL 输入）
+
+- 按字节范围把输入切成若干分片，分片边界对齐到行首，无需预先扫描整个文件
+- 每个分片独立处理：结果写入自己的 Parquet 目录（先写临时目录再改名），完成后写 .done 标记
+- 任务中断后重新运行只处理没有 .done 标记的分片；全部完成后合并为一个按类型分区的数据集，
+  并把分片内的记录序号换算为全局序号（与 extract_all 的输出格式相同，可直接建索引）
+
+用法:
+    python sharded_extract_副本.py --data-files data/open-patients/train.jsonl --work-dir results/entity_shards
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from functools import partial
+from multiprocessing import Pool
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from entity_matcher_副本 import build_matcher
+from entity_writer_副本 import (SpanWriter, open_span_dataset, read_records, write_manifest,
+                              PARTITION_COLS, RECORDS_DIR)
+from parquet_reader_副本 import TEXT_COLUMNS, ID_COLUMNS
+
+PLAN_FILE = "plan.json"
+
+
+def plan_shards(path, shard_bytes):
+    """
+    把文件按约 shard_bytes 字节切分，返回 [(起始偏移, 结束偏移), ...]。
+
+    每个边界向后移到下一行的行首，因此每一行恰好属于一个分片。
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as f:
+        target = shard_bytes
+        while target < size:
+            f.seek(target - 1)
+            f.readline()  # 读完 target-1 所在的行，指针停在下一行行首
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+            target = boundary + shard_bytes
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def load_or_create_plan(work_dir, data_file, shard_bytes, vocab_dir):
+    """
+    读取已有的分片计划；输入文件或参数变化时拒绝续跑（否则旧分片的结果会与新分片错位）
+    """
+    stat = os.stat(data_file)
+    source = {"path": os.path.abspath(data_file), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+              "shard_bytes": shard_bytes, "vocab_dir": os.path.abspath(vocab_dir)}
+    plan_path = os.path.join(work_dir, PLAN_FILE)
+    if os.path.exists(plan_path):
+        with open(plan_path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+        if plan["source"] != source:
+            raise ValueError(f"{plan_path} 与当前输入或参数不一致，请使用 --restart 重新开始")
+        return plan
+
+    os.makedirs(work_dir, exist_ok=True)
+    plan = {"source": source, "shards": plan_shards(data_file, shard_bytes)}
+    tmp_path = plan_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, plan_path)
+    return plan
+
+
+def shard_dir(work_dir, shard):
+    return os.path.join(work_dir, f"shard-{shard:05d}")
+
+
+def done_marker(work_dir, shard):
+    return shard_dir(work_dir, shard) + ".done"
+
+
+def iter_shard_lines(path, start, end):
+    """逐行读取 [start, end) 字节范围，产出 (行起始偏移, 行内容)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            yield offset, line
+            offset += len(line)
+
+
+def process_shard(shard, plan, work_dir, text_column):
+    """
+    处理一个分片：结果写入临时目录，完成后改名并写 .done 标记（记录数、实体数、耗时）。
+
+    记录序号 record_idx 为分片内序号，合并时再加上前面分片的记录数。
+    没有 ID 字段的记录用行在文件中的字节偏移作 ID（全局唯一且与分片方式无关）。
+    """
+    start_time = time.time()
+    data_file = plan["source"]["path"]
+    start, end = plan["shards"][shard]
+    matcher = build_matcher(plan["source"]["vocab_dir"])
+
+    final_dir = shard_dir(work_dir, shard)
+    tmp_dir = final_dir + ".tmp"
+    records = num_entities = 0
+    with SpanWriter(tmp_dir, part_prefix=f"shard-{shard:05d}") as writer:
+        for offset, line in iter_shard_lines(data_file, start, end):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            column = text_column or next((c for c in TEXT_COLUMNS if c in record), None)
+            text = record.get(column) or ""
+            rid = next((record[c] for c in ID_COLUMNS if c in record), offset)
+            spans = matcher.find_spans(text)
+            writer.add(records, rid, spans)
+            num_entities += len(spans)
+            records += 1
+
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+    os.replace(tmp_dir, final_dir)
+    stats = {"shard": shard, "records": records, "entities": num_entities,
+             "seconds": time.time() - start_time}
+    with open(done_marker(work_dir, shard) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    os.replace(done_marker(work_dir, shard) + ".tmp", done_marker(work_dir, shard))
+    return stats
+
+
+def merge_shards(plan, work_dir, output):
+    """按分片顺序合并实体区间和记录清单，record_idx 加上前面分片的记录数，得到全局序号"""
+    tmp_output = output.rstrip("/") + ".tmp"
+    if os.path.exists(tmp_output):
+        shutil.rmtree(tmp_output)
+    os.makedirs(os.path.join(tmp_output, RECORDS_DIR))
+
+    record_offset = total_entities = 0
+    for shard in range(len(plan["shards"])):
+        with open(done_marker(work_dir, shard), "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        directory = shard_dir(work_dir, shard)
+        if stats["entities"]:
+            table = open_span_dataset(directory).to_table()
+            table = table.set_column(table.schema.get_field_index("record_idx"), "record_idx",
+                                     pc.add(table["record_idx"], pa.scalar(record_offset, pa.int64())))
+            pq.write_to_dataset(table, tmp_output, partition_cols=PARTITION_COLS,
+                                basename_template=f"shard-{shard:05d}-{{i}}.parquet",
+                                existing_data_behavior="overwrite_or_ignore")
+            total_entities += table.num_rows
+        records = read_records(directory)
+        if records is not None and records.num_rows:
+            records = records.set_column(0, "record_idx",
+                                         pc.add(records["record_idx"], pa.scalar(record_offset, pa.int64())))
+            pq.write_table(records, os.path.join(tmp_output, RECORDS_DIR, f"shard-{shard:05d}.parquet"))
+        record_offset += stats["records"]
+    write_manifest(tmp_output, record_offset)
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.replace(tmp_output, output)
+    return record_offset, total_entities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片、可续跑的实体抽取")
+    parser.add_argument("--data-files", default="data/open-patients/train.jsonl", help="未压缩的 JSONL 文件")
+    parser.add_argument("--text-column", default=None, help="默认自动识别（text / description）")
+    parser.add_argument("--vocab-dir", default="data/vocab")
+    parser.add_argument("--shard-mb", type=float, default=256, help="每个分片的大致大小（MB）")
+    parser.add_argument("--work-dir", default="results/entity_shards", help="分片计划、分片结果和完成标记")
+    parser.add_argument("--output", default="results/entity_spans", help="合并后的分区 Parquet 数据集目录")
+    parser.add_argument("--num-proc", type=int, default=os.cpu_count())
+    parser.add_argument("--restart", action="store_true", help="丢弃已有分片结果，从头开始")
+    parser.add_argument("--no-merge", action="store_true", help="只处理分片，不合并")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.work_dir):
+        shutil.rmtree(args.work_dir)
+
+    start = time.time()
+    plan = load_or_create_plan(args.work_dir, args.data_files, int(args.shard_mb * 1024 ** 2), args.vocab_dir)
+    num_shards = len(plan["shards"])
+    pending = [i for i in range(num_shards) if not os.path.exists(done_marker(args.work_dir, i))]
+    print(f"✅ {args.data_files}: {plan['source']['size'] / 1024 ** 2:.1f} MB，{num_shards} 个分片，"
+          f"待处理 {len(pending)} 个")
+
+    if pending:
+        worker = partial(process_shard, plan=plan, work_dir=args.work_dir, text_column=args.text_column)
+        with Pool(min(args.num_proc, len(pending))) as pool:
+            for done, stats in enumerate(pool.imap_unordered(worker, pending), 1):
+                print(f"  ✅ 分片 {stats['shard']}: {stats['records']} 条记录，{stats['entities']} 个实体，"
+                      f"{stats['seconds']:.1f} 秒（{stats['records'] / max(stats['seconds'], 1e-9):.0f} 条/秒）"
+                      f" [{done}/{len(pending)}]")
+
+    if args.no_merge:
+        return
+    records, num_entities = merge_shards(plan, args.work_dir, args.output)
+    total_seconds = time.time() - start
+    print(f"✅ 结果已合并到 {args.output}")
+    print(f"  记录数: {records}，实体数: {num_entities}")
+    print(f"  总耗时: {total_seconds:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
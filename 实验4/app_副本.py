@@ -9,9 +9,10 @@ from config import (
     MAX_ARTICLES_TO_INDEX, MILVUS_LITE_DATA_PATH, COLLECTION_NAME,
     id_to_doc_map
 )
-from data_utils import load_data
+from columnar_store_副本 import load_chunk_records as load_data
 from models_副本 import load_embedding_model
 from milvus_utils import get_milvus_client, setup_milvus_collection, index_data_if_needed, search_similar_documents
+from entity_tagging_副本 import resolve_entities
 
 # ========== 简单回答函数（完全独立，不依赖rag_core.py） ==========
 def generate_simple_answer(query, context_docs):
@@ -112,13 +113,24 @@ if milvus_client:
         query = st.text_input("请输入一个医疗相关问题：", 
                             placeholder="例如：什么是白血病？皮肤癌有哪些症状？",
                             key="query_input")
+
+        # 可选的实体约束：只在包含这些实体的文档中检索
+        entity_input = st.text_input("限定实体（可选，逗号分隔）：",
+                                     placeholder="例如：EGFR, osimertinib 或 gene:egfr",
+                                     key="entity_input")
         
         if st.button("🔍 搜索答案", type="primary", key="submit_button") and query:
             start_time = time.time()
             
             # 1. 搜索相似文档
+            entities, unknown_entities = resolve_entities(entity_input.split(","))
+            if unknown_entities:
+                st.warning(f"⚠️ 词表中没有以下实体，已忽略：{', '.join(unknown_entities)}")
+            if entities:
+                st.caption(f"🏷️ 实体过滤：{', '.join(entities)}")
             with st.spinner("正在搜索相关医疗文档..."):
-                retrieved_ids, distances = search_similar_documents(milvus_client, query, embedding_model)
+                retrieved_ids, distances = search_similar_documents(milvus_client, query, embedding_model,
+                                                                    entities=entities)
             
             if not retrieved_ids:
                 st.warning("⚠️ 未找到相关医疗文档，请尝试其他问题")
@@ -144,6 +156,8 @@ if milvus_client:
                                        expanded=(i == 0)):
                             st.write(f"**标题：** {doc.get('title', '无标题')}")
                             st.write(f"**内容：** {doc.get('abstract', '无内容')}")
+                            if doc.get('entity_ids'):
+                                st.write(f"**实体：** {', '.join(doc['entity_ids'])}")
                             if 'distance' in doc:
                                 st.write(f"**相关度：** {doc['distance']:.4f} (值越小越相关)")
                     
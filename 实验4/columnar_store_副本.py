@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式存储 - chunk记录（Parquet）与向量（Arrow IPC）
+替代 indent 格式的 JSON 数组：按类型存列、可内存映射、可按 row group 读取
+"""
+
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# chunk记录的列类型（各预处理脚本字段的并集，缺失字段为 null）
+CHUNK_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("abstract", pa.large_string()),
+    ("source_file", pa.string()),
+    ("chunk_index", pa.int32()),
+    ("corpus_name", pa.string()),
+    ("chunk_length", pa.int32()),
+])
+
+ROW_GROUP_SIZE = 1024  # 每个 row group 的 chunk 数
+
+
+def write_chunks_parquet(records, output_path, row_group_size=ROW_GROUP_SIZE):
+    """
+    将chunk记录写为 Parquet 文件
+
+    Args:
+        records (list[dict]): 与 save_chunks_to_json 相同结构的记录
+        output_path (str): 输出路径（.parquet）
+        row_group_size (int): 每个 row group 的行数
+    """
+    table = pa.Table.from_pylist(
+        [{name: rec.get(name) for name in CHUNK_SCHEMA.names} for rec in records],
+        schema=CHUNK_SCHEMA
+    )
+    pq.write_table(table, output_path, row_group_size=row_group_size, compression="zstd")
+    return table
+
+
+def read_chunks(path, columns=None, filters=None):
+    """以内存映射方式读取chunk表，可只读部分列或按条件过滤"""
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+
+def iter_chunk_row_groups(path, columns=None):
+    """逐个 row group 读取chunk表，内存占用只与单个 row group 有关"""
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for i in range(parquet_file.num_row_groups):
+        yield parquet_file.read_row_group(i, columns=columns)
+
+
+def sample_chunks(path, n, seed=42, columns=None):
+    """随机抽样 n 条chunk（只解码被抽中的行所在的 row group）"""
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    total = parquet_file.metadata.num_rows
+    rng = np.random.RandomState(seed)
+    picked = np.sort(rng.choice(total, size=min(n, total), replace=False))
+
+    # 行号 → (row group, 组内偏移)
+    group_starts = np.cumsum([0] + [parquet_file.metadata.row_group(i).num_rows
+                                    for i in range(parquet_file.num_row_groups)])
+    group_of_row = np.searchsorted(group_starts, picked, side="right") - 1
+
+    pieces = []
+    for group in np.unique(group_of_row):
+        local = picked[group_of_row == group] - group_starts[group]
+        pieces.append(parquet_file.read_row_group(int(group), columns=columns).take(local))
+    return pa.concat_tables(pieces) if pieces else parquet_file.schema_arrow.empty_table()
+
+
+def load_chunk_records(path):
+    """读取chunk记录为 list[dict]，兼容旧的 JSON 文件"""
+    if path.endswith(".parquet"):
+        return read_chunks(path).to_pylist()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_embeddings(ids, embeddings, output_path, model_name=None):
+    """
+    将向量保存为 Arrow IPC 文件（未压缩，可直接内存映射）
+
+    Args:
+        ids (list[str]): 与chunk表 id 列对应的ID
+        embeddings (array-like): 形状 (n, dim) 的向量
+        output_path (str): 输出路径（.arrow）
+        model_name (str): 生成向量的嵌入模型，与维度一起写入 schema 元数据，复用前据此校验
+    """
+    matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+    n, dim = matrix.shape
+    vectors = pa.FixedSizeListArray.from_arrays(pa.array(matrix.reshape(-1)), dim)
+    metadata = {"embedding_dim": str(dim)}
+    if model_name:
+        metadata["model_name"] = model_name
+    table = pa.table({"id": pa.array(ids, type=pa.string()), "embedding": vectors}, metadata=metadata)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with pa.OSFile(output_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return n, dim
+
+
+def read_embedding_metadata(path):
+    """
+    读取向量文件的 schema 元数据（不读取向量本身）
+
+    Returns:
+        dict: {"model_name": 模型名或 None, "embedding_dim": 维度}
+    """
+    with pa.memory_map(path, "r") as source:
+        schema = pa.ipc.open_file(source).schema
+    metadata = {k.decode(): v.decode() for k, v in (schema.metadata or {}).items()}
+    return {"model_name": metadata.get("model_name"),
+            "embedding_dim": schema.field("embedding").type.list_size}
+
+
+def load_embeddings(path):
+    """
+    内存映射读取向量文件
+
+    Returns:
+        tuple: (ids 列, 形状 (n, dim) 的 float32 只读视图，不发生拷贝)
+    """
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    column = table.column("embedding").combine_chunks()
+    dim = column.type.list_size
+    matrix = column.values.to_numpy(zero_copy_only=True).reshape(-1, dim)
+    return table.column("id"), matrix
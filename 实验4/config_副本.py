@@ -1,11 +1,19 @@
+import os
+
 # Milvus Lite Configuration
 MILVUS_LITE_DATA_PATH = "./milvus_lite_data.db" # Path to store Milvus Lite data
 COLLECTION_NAME = "medical_rag_lite" # Use a different name if needed
 
 # Data Configuration
-DATA_FILE = "./data/processed_medical_v2.json"
+DATA_FILE = "./data/processed_medical_v2.parquet"  # 列式chunk表（兼容旧的 .json）
+EMBEDDINGS_FILE = "./data/processed_medical_v2_embeddings.arrow"  # 与chunk表对应的向量（Arrow IPC）
 MAX_ARTICLES_TO_INDEX = 2000  # 最大索引文档数
 
+# Entity Tagging Configuration（实验3 词典匹配器的词表目录；缺失时使用默认词表）
+ENTITY_VOCAB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "实验3", "data", "vocab")
+MAX_ENTITIES_PER_CHUNK = 4096  # entity_ids 数组字段容量（Milvus ARRAY 字段 max_capacity 的上限）
+ENTITY_ID_MAX_LENGTH = 256
+
 # Model Configuration
 # Example: 'all-MiniLM-L6-v2' (dim 384), 'thenlper/gte-large' (dim 1024)
 EMBEDDING_MODEL_NAME = 'BAAI/bge-small-zh-v1.5'
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近重复chunk去除 - MinHash + LSH
+位于分块（save_chunks_to_json）与向量化之间，避免重复内容被重复编码和存储
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+# 大于 2^32 的素数，用于 (a*h + b) % P 形式的哈希置换
+_MERSENNE_LIKE_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def _shingles(text, shingle_size=5):
+    """将文本规范化后切成字符 n-gram（中英文混合文本都适用）"""
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    if len(text) <= shingle_size:
+        return {text} if text else set()
+    return {text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1)}
+
+
+def _optimal_bands(threshold, num_perm):
+    """
+    选择 LSH 的 (bands, rows)，使 (1/bands)^(1/rows) 最接近阈值
+    （该值近似为候选概率曲线的拐点）
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        knee = (1.0 / bands) ** (1.0 / rows)
+        score = abs(knee - threshold)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+def minhash_signatures(chunks, num_perm=128, shingle_size=5, seed=42):
+    """
+    计算每个chunk的 MinHash 签名
+
+    Returns:
+        np.ndarray: 形状 (len(chunks), num_perm) 的 uint64 签名矩阵
+    """
+    rng = np.random.RandomState(seed)
+    # a < 2^31 保证 a*h（h < 2^32）不会溢出 uint64
+    a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+
+    signatures = np.full((len(chunks), num_perm), _MAX_HASH, dtype=np.uint64)
+    for i, chunk in enumerate(chunks):
+        shingles = _shingles(chunk, shingle_size)
+        if not shingles:
+            continue
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        # (n_shingles, num_perm) 的置换哈希，取每列最小值
+        permuted = (np.outer(hashes, a) + b) % _MERSENNE_LIKE_PRIME
+        signatures[i] = permuted.min(axis=0) & _MAX_HASH
+    return signatures
+
+
+def deduplicate_chunks(chunks, threshold=0.85, num_perm=128, shingle_size=5, seed=42):
+    """
+    MinHash/LSH 近重复去除
+
+    Args:
+        chunks (list[str]): 分块后的文本
+        threshold (float): 估计 Jaccard 相似度阈值，>= 该值视为重复
+        num_perm (int): MinHash 置换数
+        shingle_size (int): 字符 n-gram 长度
+        seed (int): 随机种子，保证结果可复现
+
+    Returns:
+        tuple: (保留的chunks, 保留chunk的原始下标, {被删除下标: (规范chunk下标, 估计相似度)})
+    """
+    n = len(chunks)
+    if n == 0:
+        return [], [], {}
+
+    signatures = minhash_signatures(chunks, num_perm, shingle_size, seed)
+    bands, rows = _optimal_bands(threshold, num_perm)
+
+    # 并查集：同一连通分量中最小下标作为规范chunk
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    similarity = {}
+    for band in range(bands):
+        buckets = {}
+        band_sig = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            buckets.setdefault(band_sig[i].tobytes(), []).append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # 桶内所有候选对都用完整签名验证（过滤 LSH 假阳性）：
+            # 只和桶内第一个比较会漏掉第一个与其余无关时的重复对
+            members = np.asarray(members)
+            member_sigs = signatures[members]
+            for j in range(len(members) - 1):
+                est = np.mean(member_sigs[j + 1:] == member_sigs[j], axis=1)
+                first = int(members[j])
+                for k in np.flatnonzero(est >= threshold).tolist():
+                    other = int(members[j + 1 + k])
+                    root_a, root_b = find(first), find(other)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+                    similarity[other] = max(similarity.get(other, 0.0), float(est[k]))
+
+    kept_chunks, kept_indices, duplicate_map = [], [], {}
+    for i in range(n):
+        root = find(i)
+        if root == i:
+            kept_chunks.append(chunks[i])
+            kept_indices.append(i)
+        else:
+            est = similarity.get(i)
+            if est is None:
+                est = float(np.mean(signatures[i] == signatures[root]))
+            duplicate_map[i] = (root, est)
+
+    print(f"🧹 近重复去除: {n} → {len(kept_chunks)} 个chunk "
+          f"(合并 {len(duplicate_map)} 个, 阈值={threshold}, bands={bands}, rows={rows})")
+    return kept_chunks, kept_indices, duplicate_map
+
+
+def build_duplicate_report(duplicate_map, kept_indices, corpus_name):
+    """
+    将去重映射转换为可保存的记录：被删除chunk → 规范chunk的ID
+    （规范chunk的ID与 save_chunks_to_json 生成的ID一致）
+    """
+    new_position = {orig: new for new, orig in enumerate(kept_indices)}
+    return [
+        {
+            "removed_index": removed,
+            "canonical_index": canonical,
+            "canonical_id": f"{corpus_name}_{new_position[canonical]:06d}",
+            "similarity": round(est, 4)
+        }
+        for removed, (canonical, est) in sorted(duplicate_map.items())
+    ]
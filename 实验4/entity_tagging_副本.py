@@ -0,0 +1,110 @@
+"""
+chunk 实体标注：复用实验3的词典匹配器，在分块之后、写入 Milvus 之前为每个 chunk 标注实体 ID
+（"类型:规范形式"，如 "gene:egfr"），写入带倒排索引的数组字段，检索时可先按实体过滤候选集。
+"""
+import json
+import os
+import sys
+
+from config import ENTITY_VOCAB_DIR, MAX_ENTITIES_PER_CHUNK
+
+# 实验3 与实验4 是平级目录，匹配器按路径导入
+_EXP3_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "实验3")
+if _EXP3_DIR not in sys.path:
+    sys.path.insert(0, _EXP3_DIR)
+
+from entity_matcher_副本 import build_matcher, load_vocabularies  # noqa: E402
+
+_MATCHER = None
+_NORMALIZED = None
+
+
+def get_matcher():
+    """构建一次匹配器（词表目录缺失的类型使用默认词表）"""
+    global _MATCHER
+    if _MATCHER is None:
+        _MATCHER = build_matcher(ENTITY_VOCAB_DIR)
+    return _MATCHER
+
+
+def _normalized_forms():
+    """词表中每种类型的规范形式：{类型: {小写规范形式: 规范形式}}"""
+    global _NORMALIZED
+    if _NORMALIZED is None:
+        _NORMALIZED = {entity_type: {normalized.lower(): normalized for _, normalized in entries}
+                       for entity_type, entries in load_vocabularies(ENTITY_VOCAB_DIR).items()}
+    return _NORMALIZED
+
+
+def entity_ids(text, matcher=None):
+    """
+    文本中出现的实体 ID，去重后排序。超过 MAX_ENTITIES_PER_CHUNK（数组字段容量）时只保留前面的，
+    并打印警告：被截掉的实体无法用于过滤
+    """
+    matcher = matcher or get_matcher()
+    ids = sorted({f"{span.type}:{span.normalized}" for span in matcher.find_spans(text or "")})
+    if len(ids) > MAX_ENTITIES_PER_CHUNK:
+        print(f"⚠️  chunk 含 {len(ids)} 个实体，超过 MAX_ENTITIES_PER_CHUNK={MAX_ENTITIES_PER_CHUNK}，"
+              f"丢弃 {len(ids) - MAX_ENTITIES_PER_CHUNK} 个（{ids[MAX_ENTITIES_PER_CHUNK]} 起）")
+    return ids[:MAX_ENTITIES_PER_CHUNK]
+
+
+def tag_chunks(metadata_list, text_key="content"):
+    """
+    为每个 chunk 的元数据添加 entity_ids 字段（原地修改）
+
+    Returns:
+        dict: {实体 ID: 出现的 chunk 数}
+    """
+    matcher = get_matcher()
+    counts = {}
+    for metadata in metadata_list:
+        metadata["entity_ids"] = entity_ids(metadata.get(text_key, ""), matcher)
+        for eid in metadata["entity_ids"]:
+            counts[eid] = counts.get(eid, 0) + 1
+    return counts
+
+
+def resolve_entities(terms):
+    """
+    把用户输入的实体约束解析为实体 ID。
+
+    每项可以是完整 ID（"gene:egfr"、"gene:EGFR"）或词表中的词条（"EGFR"、"osimertinib"）；
+    完整 ID 的值按词表规范化（规范形式或该类型的词条均可）。不在词表中的词条或 ID 不可能匹配任何 chunk，
+    单独返回以便提示用户。
+
+    Returns:
+        (实体 ID 列表, 未识别的词条列表)
+    """
+    matcher = get_matcher()
+    resolved, unknown = [], []
+    for term in terms:
+        term = term.strip()
+        if not term:
+            continue
+        entity_type, sep, value = term.partition(":")
+        entity_type, value = entity_type.strip().lower(), value.strip()
+        if sep and entity_type in matcher.types:
+            normalized = _normalized_forms().get(entity_type, {}).get(value.lower())
+            if normalized is None:
+                spans = [s for s in matcher.find_spans(value)
+                         if s.type == entity_type and s.start == 0 and s.end == len(value)]
+                normalized = spans[0].normalized if spans else None
+            if normalized is None:
+                unknown.append(term)
+            else:
+                resolved.append(f"{entity_type}:{normalized}")
+            continue
+        spans = [s for s in matcher.find_spans(term) if s.start == 0 and s.end == len(term)]
+        if spans:
+            resolved.extend(f"{s.type}:{s.normalized}" for s in spans)
+        else:
+            unknown.append(term)
+    return sorted(set(resolved)), unknown
+
+
+def entity_filter_expr(entities, field="entity_ids"):
+    """Milvus 标量过滤表达式：chunk 必须包含全部给定实体"""
+    if not entities:
+        return ""
+    return f"array_contains_all({field}, {json.dumps(list(entities), ensure_ascii=False)})"
@@ -8,8 +8,9 @@ import os
 from config import (
     MILVUS_LITE_DATA_PATH, COLLECTION_NAME, EMBEDDING_DIM,
     MAX_ARTICLES_TO_INDEX, INDEX_METRIC_TYPE, INDEX_TYPE, INDEX_PARAMS,
-    SEARCH_PARAMS, TOP_K, id_to_doc_map
+    SEARCH_PARAMS, TOP_K, id_to_doc_map, MAX_ENTITIES_PER_CHUNK, ENTITY_ID_MAX_LENGTH
 )
+from entity_tagging_副本 import entity_ids, entity_filter_expr
 
 @st.cache_resource
 def get_milvus_client():
@@ -26,6 +27,15 @@ def get_milvus_client():
         st.error(f"Failed to initialize Milvus Lite client: {e}")
         return None
 
+def _has_entity_field(client, collection_name):
+    """已有集合是否包含容量足够的 entity_ids 数组字段"""
+    fields = client.describe_collection(collection_name).get("fields", [])
+    for field in fields:
+        if field.get("name") == "entity_ids":
+            capacity = field.get("params", {}).get("max_capacity")
+            return capacity is None or int(capacity) >= MAX_ENTITIES_PER_CHUNK
+    return False
+
 @st.cache_resource
 def setup_milvus_collection(_client):
     """Ensures the specified collection exists and is set up correctly in Milvus Lite."""
@@ -38,6 +48,14 @@ def setup_milvus_collection(_client):
 
         has_collection = collection_name in _client.list_collections()
 
+        # 旧版本建立的集合没有 entity_ids 字段（或容量更小）：按实体过滤会报错，且行数不变时不会重新写入，
+        # 因此删除后按当前 schema 重建，由 index_data_if_needed 重新写入数据
+        if has_collection and not _has_entity_field(_client, collection_name):
+            st.warning(f"Collection '{collection_name}' has no 'entity_ids' field with capacity "
+                       f"{MAX_ENTITIES_PER_CHUNK} (created by an older version). Dropping and rebuilding...")
+            _client.drop_collection(collection_name)
+            has_collection = False
+
         if not has_collection:
             st.write(f"Collection '{collection_name}' not found. Creating...")
             # Define fields using new API style if needed (older style might still work)
@@ -46,6 +64,9 @@ def setup_milvus_collection(_client):
                 FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim),
                 # You can add other scalar fields directly here for storage
                 FieldSchema(name="content_preview", dtype=DataType.VARCHAR, max_length=500), # Example
+                # 实体 ID（"类型:规范形式"），检索时用 array_contains_all 预先过滤
+                FieldSchema(name="entity_ids", dtype=DataType.ARRAY, element_type=DataType.VARCHAR,
+                            max_capacity=MAX_ENTITIES_PER_CHUNK, max_length=ENTITY_ID_MAX_LENGTH),
             ]
             schema = CollectionSchema(fields, f"PubMed Lite RAG (dim={dim})")
 
@@ -71,9 +92,17 @@ def setup_milvus_collection(_client):
             )
             _client.create_index(collection_name, index_params)
             st.success(f"Index created for collection '{collection_name}'.")
+
+            # 实体数组字段的倒排索引（部分 Milvus Lite 版本不支持标量索引，过滤仍可用，只是逐条扫描）
+            try:
+                scalar_index_params = _client.prepare_index_params()
+                scalar_index_params.add_index(field_name="entity_ids", index_type="INVERTED")
+                _client.create_index(collection_name, scalar_index_params)
+                st.write("Inverted index created for 'entity_ids'.")
+            except Exception as e:
+                st.warning(f"Could not create inverted index on 'entity_ids': {e}")
         else:
             st.write(f"Found existing collection: '{collection_name}'.")
-            # Optional: Check schema compatibility if needed
 
         # Determine current entity count (fallback between num_entities and stats)
         try:
@@ -134,15 +163,18 @@ def index_data_if_needed(client, data, embedding_model):
 
              doc_id = i # Use list index as ID
              needed_count += 1
+             doc_entities = entity_ids(content)
              temp_id_map[doc_id] = {
-                 'title': title, 'abstract': abstract, 'content': content
+                 'title': title, 'abstract': abstract, 'content': content,
+                 'entity_ids': doc_entities
              }
              docs_for_embedding.append(content)
              # Prepare data in dict format for MilvusClient
              data_to_insert.append({
                  "id": doc_id,
                  "embedding": None, # Placeholder, will be filled after encoding
-                 "content_preview": content[:500] # Store preview if field exists
+                 "content_preview": content[:500], # Store preview if field exists
+                 "entity_ids": doc_entities
              })
 
 
@@ -188,8 +220,12 @@ def index_data_if_needed(client, data, embedding_model):
          return False
 
 
-def search_similar_documents(client, query, embedding_model):
-    """Searches Milvus Lite for documents similar to the query using MilvusClient."""
+def search_similar_documents(client, query, embedding_model, entities=None):
+    """
+    Searches Milvus Lite for documents similar to the query using MilvusClient.
+
+    entities: 可选的实体 ID 列表（如 ["gene:egfr"]），只在包含全部这些实体的 chunk 中做向量检索。
+    """
     if not client or not embedding_model:
         st.error("Milvus client or embedding model not available for search.")
         return [], []
@@ -206,6 +242,8 @@ def search_similar_documents(client, query, embedding_model):
             "limit": TOP_K,
             "output_fields": ["id"]
         }
+        if entities:
+            search_params["filter"] = entity_filter_expr(entities)
         
         # 尝试不同的方式传递搜索参数
         if hasattr(client, 'search_with_params'):
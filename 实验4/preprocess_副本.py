@@ -1,8 +1,11 @@
 import os
 import json
+import hashlib
 from bs4 import BeautifulSoup
 import re
 
+from columnar_store_副本 import write_chunks_parquet, read_chunks
+
 def extract_text_and_title_from_html(html_filepath):
     """
     从指定的 HTML 文件中提取标题和正文文本。
@@ -116,9 +119,71 @@ def split_text(text, chunk_size=500, chunk_overlap=50):
 
     return [c.strip() for c in chunks if c.strip()] # 返回非空块
 
+def file_content_hash(filepath, block_size=1 << 20):
+    """计算文件内容的 SHA-256（分块读取，避免大文件一次性载入内存）"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(manifest_path):
+    """
+    读取上一次运行的清单。
+
+    清单结构: {"files": {文件名: {"size", "mtime_ns", "sha256", "chunk_ids"}},
+              "chunking": {"chunk_size", "chunk_overlap"}, ...}
+    """
+    if not os.path.exists(manifest_path):
+        return {"files": {}}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"警告：无法读取清单 {manifest_path}，将全量处理: {e}")
+        return {"files": {}}
+
+def save_manifest(manifest, manifest_path):
+    """原子写入清单（先写临时文件再替换），避免中断时留下损坏的清单"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def classify_files(html_directory, html_files, previous_files, rechunk=False):
+    """
+    对比清单，将文件分为未变化 / 需要重新处理 / 已删除三类。
+
+    先比较大小和修改时间；二者有变化时再比较内容哈希（仅 touch 过的文件不会重新处理）。
+    rechunk=True（分块参数变化）时所有现存文件都需要重新处理。
+
+    Returns:
+        tuple: (未变化文件 {文件名: 清单条目}, 需处理文件 {文件名: 新指纹}, 已删除文件名列表)
+    """
+    unchanged, changed = {}, {}
+    for filename in html_files:
+        filepath = os.path.join(html_directory, filename)
+        stat = os.stat(filepath)
+        previous = None if rechunk else previous_files.get(filename)
+        if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+            unchanged[filename] = previous
+            continue
+
+        content_hash = file_content_hash(filepath)
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": content_hash}
+        if previous and previous["sha256"] == content_hash:
+            unchanged[filename] = dict(previous, **fingerprint)
+        else:
+            changed[filename] = fingerprint
+
+    current = set(html_files)
+    deleted = [name for name in previous_files if name not in current]
+    return unchanged, changed, deleted
+
 # --- 配置 ---
 html_directory = './data/' # **** 修改为你的 HTML 文件夹路径 ****
-output_json_path = './data/processed_data.json' # **** 输出 JSON 文件路径 ****
+output_path = './data/processed_data.parquet' # **** 输出 Parquet 文件路径 ****
+manifest_path = './data/processed_data_manifest.json' # 增量处理清单（文件指纹 → chunk ID）
 CHUNK_SIZE = 512  # 每个文本块的目标大小（字符数）
 CHUNK_OVERLAP = 50 # 相邻文本块的重叠大小（字符数）
 
@@ -130,17 +195,43 @@ chunk_count = 0
 print(f"开始处理目录 '{html_directory}' 中的 HTML 文件...")
 
 # 确保输出目录存在
-os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
+os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-html_files = [f for f in os.listdir(html_directory) if f.endswith('.html')]
+html_files = sorted(f for f in os.listdir(html_directory) if f.endswith('.html'))
 print(f"找到 {len(html_files)} 个 HTML 文件。")
 
+# --- 增量判断：只有新增或内容变化的文件需要重新解析和分块 ---
+manifest = load_manifest(manifest_path)
+if not os.path.exists(output_path):
+    manifest = {"files": {}} # 输出文件丢失时清单失效，全量处理
+chunking = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+rechunk = bool(manifest["files"]) and manifest.get("chunking") != chunking
+if rechunk:
+    print(f"分块参数已变化（{manifest.get('chunking')} → {chunking}），所有文件重新分块。")
+unchanged_files, changed_files, deleted_files = classify_files(
+    html_directory, html_files, manifest["files"], rechunk
+)
+print(f"未变化: {len(unchanged_files)} 个，需处理: {len(changed_files)} 个，已删除: {len(deleted_files)} 个。")
+
+# 保留未变化文件已生成的 chunk（已删除或变化文件的旧 chunk 被丢弃）
+if unchanged_files:
+    previous_table = read_chunks(output_path)
+    all_data_for_milvus = [
+        rec for rec in previous_table.to_pylist() if rec["source_file"] in unchanged_files
+    ]
+
+new_manifest_files = dict(unchanged_files)
+upserted_chunk_ids = []
+
 for filename in html_files:
+    if filename not in changed_files:
+        continue
     filepath = os.path.join(html_directory, filename)
     print(f"  处理文件: {filename} ...")
     file_count += 1
 
     title, main_text = extract_text_and_title_from_html(filepath)
+    chunk_ids = []
 
     if main_text:
         chunks = split_text(main_text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
@@ -150,22 +241,45 @@ for filename in html_files:
             chunk_count += 1
             # 构建符合 milvus_utils.py 期望的字典结构
             milvus_entry = {
-                "id": f"{filename}_{i}", # 创建一个唯一的 ID (文件名 + 块索引)
+                "id": f"{filename}_{i}", # 创建一个唯一的 ID (文件名 + 块索引)，重复运行时保持稳定
                 "title": title or filename, # 使用提取的标题或文件名
                 "abstract": chunk, # 将文本块放入 'abstract' 字段
                 "source_file": filename, # 添加原始文件名以供参考
                 "chunk_index": i
             }
             all_data_for_milvus.append(milvus_entry)
+            chunk_ids.append(milvus_entry["id"])
     else:
         print(f"    警告：未能从 {filename} 提取有效文本内容。")
 
-print(f"\n处理完成。共处理 {file_count} 个文件，生成 {chunk_count} 个文本块。")
+    new_manifest_files[filename] = dict(changed_files[filename], chunk_ids=chunk_ids)
+    upserted_chunk_ids.extend(chunk_ids)
+
+# 旧版本中存在、新版本中不再存在的 chunk ID，下游索引据此删除
+stale_files = deleted_files + [name for name in changed_files if name in manifest["files"]]
+previous_ids = {cid for name in stale_files for cid in manifest["files"][name]["chunk_ids"]}
+deleted_chunk_ids = sorted(previous_ids - set(upserted_chunk_ids))
 
-# --- 保存为 JSON ---
+print(f"\n处理完成。共处理 {file_count} 个文件，生成 {chunk_count} 个文本块，"
+      f"删除 {len(deleted_chunk_ids)} 个旧文本块，当前共 {len(all_data_for_milvus)} 个文本块。")
+
+# --- 保存为 Parquet ---
 try:
-    with open(output_json_path, 'w', encoding='utf-8') as f:
-        json.dump(all_data_for_milvus, f, ensure_ascii=False, indent=4)
-    print(f"结果已保存到: {output_json_path}")
+    if changed_files or deleted_files or not os.path.exists(output_path):
+        write_chunks_parquet(all_data_for_milvus, output_path)
+        print(f"结果已保存到: {output_path}")
+    else:
+        print(f"没有文件变化，保留现有结果: {output_path}")
+
+    # 清单在输出成功写入后更新；变更列表供下游增量索引使用
+    save_manifest({
+        "files": new_manifest_files,
+        "chunking": chunking,
+        "last_run": {
+            "upserted_chunk_ids": upserted_chunk_ids,
+            "deleted_chunk_ids": deleted_chunk_ids
+        }
+    }, manifest_path)
+    print(f"清单已更新: {manifest_path}")
 except Exception as e:
-    print(f"错误：无法写入 JSON 文件 {output_json_path}: {e}")
+    print(f"错误：无法写入 Parquet 文件 {output_path}: {e}")
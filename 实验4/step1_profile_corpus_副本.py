@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语料单遍流式分析 - 替代 step1 系列探索脚本
+不整体加载 medical.json，不只看前 N 个字符，一次遍历全文统计：
+段落/chunk长度分布、标题模式命中、中英文比例、预计chunk数与向量化成本
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import time
+
+from config import EMBEDDING_DIM
+
+# 段落长度分布的分桶边界（字符）
+LENGTH_BINS = [0, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# 候选分块大小（字符），分别估算chunk数与成本
+CANDIDATE_CHUNK_SIZES = [500, 800, 1200]
+FIXED_OVERLAP = 150  # 固定长度分块的重叠大小
+
+# 向量化成本估算参数
+ASSUMED_TOKENS_PER_SECOND = 20000  # 假设的编码吞吐（token/秒），按实际硬件调整
+
+# 标题/分隔模式（与 step2 分块脚本及 step1_analyze_text_structure 中的模式一致，按行首匹配）
+HEADING_PATTERNS = {
+    "数字标题": r'^\d+\s+[A-Z][a-z]+(?:\s+[A-Za-z]+)*',
+    "大写标题": r'^[A-Z][A-Z\s]{4,}[A-Z]$',
+    "About": r'^About\s+.+',
+    "What is": r'^What is\s+.+\?',
+    "How is": r'^How is\s+.+\?',
+    "Signs and symptoms": r'^Signs and symptoms',
+    "Risk factors": r'^Risk factors',
+    "Diagnosis": r'^Diagnosis',
+    "Treatment": r'^Treatment',
+    "Key points": r'^Key points',
+    "Markdown标题": r'^#+ ',
+    "数字列表": r'^\d+\.\s',
+    "项目符号": r'^•\s',
+    "分隔线": r'^-{3,}',
+    "冒号标题": r'^[A-Z][a-z]+: ',
+}
+
+_CASE_INSENSITIVE = {"About", "What is", "How is", "Signs and symptoms", "Risk factors",
+                     "Diagnosis", "Treatment", "Key points"}
+
+_CJK = re.compile(r'[\u4e00-\u9fff]')
+_LATIN_WORD = re.compile(r'[A-Za-z]+')
+_JSON_STRING_TOKEN = re.compile(r'[^"\\]+|\\u[0-9a-fA-F]{4}|\\[^u]|"')
+
+
+def iter_json_string_field(file_path, field="context", buf_size=1 << 20):
+    """
+    流式解码 JSON 顶层对象中某个字符串字段的值，按片段产出文本
+
+    只缓存一个读缓冲区，内存占用与文件大小无关。
+    """
+    key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+    with open(file_path, 'r', encoding='utf-8') as f:
+        # 1. 定位字段开头
+        window = ""
+        while True:
+            block = f.read(buf_size)
+            if not block:
+                raise ValueError(f"未找到字符串字段 '{field}'")
+            window += block
+            match = key.search(window)
+            if match:
+                pending = window[match.end():]
+                break
+            window = window[-(len(field) + 64):]  # 保留尾部，防止键被缓冲区截断
+
+        # 2. 逐片段解码，直到未转义的结束引号
+        while True:
+            pos, raw, finished = 0, [], False
+            while pos < len(pending):
+                token = _JSON_STRING_TOKEN.match(pending, pos)
+                if not token:
+                    break  # 缓冲区末尾的不完整转义，留到下一轮
+                if token.group() == '"':
+                    finished = True
+                    break
+                raw.append(token.group())
+                pos = token.end()
+            # 高位代理项须与下一个转义一起解码
+            if not finished and raw and re.fullmatch(r'\\u[dD][89abAB][0-9a-fA-F]{2}', raw[-1]):
+                pos -= len(raw.pop())
+            if raw:
+                yield json.loads('"' + "".join(raw) + '"')
+            if finished:
+                return
+            block = f.read(buf_size)
+            if not block:
+                raise ValueError(f"字段 '{field}' 的字符串未正常结束")
+            pending = pending[pos:] + block
+
+
+def iter_paragraphs(pieces):
+    """将文本片段流按换行切分为段落（跨片段的段落会被拼接完整）"""
+    carry = ""
+    for piece in pieces:
+        lines = (carry + piece).split('\n')
+        carry = lines.pop()
+        for line in lines:
+            yield line
+    yield carry
+
+
+def _histogram(bins):
+    labels = [f"{lo}-{hi}" for lo, hi in zip(bins, bins[1:])] + [f">={bins[-1]}"]
+    return {label: 0 for label in labels}
+
+
+def _add_to_histogram(hist, bins, value):
+    index = 0
+    for i, edge in enumerate(bins):
+        if value >= edge:
+            index = i
+    hist[list(hist)[index]] += 1
+
+
+def _estimate_tokens(text):
+    """粗略估算 token 数：每个汉字约 1 个 token，每个英文单词约 1.3 个 token"""
+    return len(_CJK.findall(text)) + 1.3 * len(_LATIN_WORD.findall(text))
+
+
+class _GreedyChunkProjector:
+    """按段落贪心打包到 max_chunk_size 的流式模拟，用于估计chunk数量与长度分布"""
+
+    def __init__(self, max_chunk_size):
+        self.max_chunk_size = max_chunk_size
+        self.current = 0
+        self.current_tokens = 0.0
+        self.chunks = 0
+        self.tokens = 0.0
+        self.hist = _histogram(LENGTH_BINS)
+
+    def _emit(self, length, tokens):
+        self.chunks += 1
+        self.tokens += tokens
+        _add_to_histogram(self.hist, LENGTH_BINS, length)
+
+    def add(self, length, tokens):
+        if length > self.max_chunk_size:
+            self.flush()
+            pieces = math.ceil(length / self.max_chunk_size)
+            for i in range(pieces):
+                piece = min(self.max_chunk_size, length - i * self.max_chunk_size)
+                self._emit(piece, tokens * piece / length)
+            return
+        if self.current and self.current + 1 + length > self.max_chunk_size:
+            self.flush()
+        self.current += length + (1 if self.current else 0)
+        self.current_tokens += tokens
+
+    def flush(self):
+        if self.current:
+            self._emit(self.current, self.current_tokens)
+        self.current, self.current_tokens = 0, 0.0
+
+    def report(self):
+        self.flush()
+        return {
+            "projected_chunks": self.chunks,
+            "chunk_length_histogram": self.hist,
+            "estimated_tokens": int(self.tokens),
+            "vector_storage_mb": round(self.chunks * EMBEDDING_DIM * 4 / 1024 / 1024, 2),
+            "estimated_encode_seconds": round(self.tokens / ASSUMED_TOKENS_PER_SECOND, 1),
+        }
+
+
+def profile_corpus(file_path, field="context"):
+    """单遍遍历语料，返回统计报告（dict）"""
+    start = time.time()
+    compiled = {
+        name: re.compile(p, re.IGNORECASE if name in _CASE_INSENSITIVE else 0)
+        for name, p in HEADING_PATTERNS.items()
+    }
+    heading_hits = {name: 0 for name in HEADING_PATTERNS}
+    heading_examples = {}
+    paragraph_hist = _histogram(LENGTH_BINS)
+    language = {"zh": 0, "en": 0, "mixed": 0, "other": 0}
+    projectors = {size: _GreedyChunkProjector(size) for size in CANDIDATE_CHUNK_SIZES}
+
+    total_chars = 0
+    total_lines = 0
+    paragraphs = 0
+    paragraph_chars = 0
+    max_paragraph = 0
+    cjk_chars = 0
+    latin_chars = 0
+
+    for line in iter_paragraphs(iter_json_string_field(file_path, field)):
+        total_lines += 1
+        total_chars += len(line) + 1
+        paragraph = line.strip()
+        if not paragraph:
+            continue
+
+        length = len(paragraph)
+        paragraphs += 1
+        paragraph_chars += length
+        max_paragraph = max(max_paragraph, length)
+        _add_to_histogram(paragraph_hist, LENGTH_BINS, length)
+
+        for name, pattern in compiled.items():
+            if pattern.match(paragraph):
+                heading_hits[name] += 1
+                heading_examples.setdefault(name, paragraph[:80])
+
+        cjk = len(_CJK.findall(paragraph))
+        latin = sum(len(w) for w in _LATIN_WORD.findall(paragraph))
+        cjk_chars += cjk
+        latin_chars += latin
+        letters = cjk + latin
+        if not letters:
+            language["other"] += 1
+        elif cjk / letters > 0.8:
+            language["zh"] += 1
+        elif latin / letters > 0.8:
+            language["en"] += 1
+        else:
+            language["mixed"] += 1
+
+        tokens = _estimate_tokens(paragraph)
+        for projector in projectors.values():
+            projector.add(length, tokens)
+
+    total_chars = max(total_chars - 1, 0)  # 最后一行没有换行符
+    step = max(1, max(CANDIDATE_CHUNK_SIZES) - FIXED_OVERLAP)
+    return {
+        "file": file_path,
+        "field": field,
+        "file_size_bytes": os.path.getsize(file_path),
+        "total_chars": total_chars,
+        "lines": total_lines,
+        "paragraphs": paragraphs,
+        "paragraph_length": {
+            "mean": round(paragraph_chars / paragraphs, 1) if paragraphs else 0,
+            "max": max_paragraph,
+            "histogram": paragraph_hist,
+        },
+        "heading_pattern_hits": heading_hits,
+        "heading_examples": heading_examples,
+        "language_mix": {
+            "paragraphs": language,
+            "cjk_chars": cjk_chars,
+            "latin_chars": latin_chars,
+        },
+        "chunking_projection": {
+            str(size): projector.report() for size, projector in projectors.items()
+        },
+        "fixed_length_projection": {
+            "chunk_size": max(CANDIDATE_CHUNK_SIZES),
+            "overlap": FIXED_OVERLAP,
+            "projected_chunks": math.ceil(max(total_chars - FIXED_OVERLAP, 1) / step),
+        },
+        "embedding_dim": EMBEDDING_DIM,
+        "assumed_tokens_per_second": ASSUMED_TOKENS_PER_SECOND,
+        "elapsed_seconds": round(time.time() - start, 2),
+    }
+
+
+def main():
+    data_file = os.path.join(os.getcwd(), "data", "medical.json")
+    report_file = os.path.join(os.getcwd(), "data", "corpus_profile.json")
+
+    if not os.path.exists(data_file):
+        print(f"❌ 文件不存在: {data_file}")
+        sys.exit(1)
+
+    print(f"📂 分析文件: {data_file}")
+    report = profile_corpus(data_file)
+
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"📏 文本长度: {report['total_chars']} 字符, 段落数: {report['paragraphs']}")
+    print(f"🔍 标题模式命中:")
+    for name, hits in report["heading_pattern_hits"].items():
+        if hits:
+            print(f"  {name}: {hits} 次")
+    print(f"🌐 段落语言分布: {report['language_mix']['paragraphs']}")
+    print(f"📦 分块预估:")
+    for size, projection in report["chunking_projection"].items():
+        print(f"  max_chunk_size={size}: {projection['projected_chunks']} 个chunk, "
+              f"约 {projection['estimated_tokens']} tokens, "
+              f"向量 {projection['vector_storage_mb']} MB")
+    print(f"\n✅ 分析完成 ({report['elapsed_seconds']} 秒)，报告保存到: {report_file}")
+
+
+if __name__ == "__main__":
+    main()
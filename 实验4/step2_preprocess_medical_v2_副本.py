@@ -8,6 +8,12 @@ import os
 import json
 import re
 
+import numpy as np
+
+from config import EMBEDDING_MODEL_NAME, EMBEDDINGS_FILE
+from dedup_chunks_副本 import deduplicate_chunks, build_duplicate_report
+from columnar_store_副本 import write_chunks_parquet, write_embeddings
+
 def load_medical_data(file_path):
     """加载medical.json数据"""
     print(f"📂 加载数据文件: {file_path}")
@@ -156,8 +162,76 @@ def split_text_fixed_length(text, chunk_size=1000, overlap=100):
     
     return chunks
 
+def split_sentences(text):
+    """按中英文句末标点和换行切分句子"""
+    sentences = re.split(r'(?<=[。！？!?])|(?<=\.)\s+|\n+', text)
+    return [s.strip() for s in sentences if s and s.strip()]
+
+def split_text_semantically(text, embedding_model, max_chunk_size=1000, min_chunk_size=200,
+                            window=2, breakpoint_percentile=90, batch_size=256):
+    """
+    语义分块：在相邻句子窗口语义相似度骤降处切分
+
+    1. 切分句子，并用嵌入模型大批量编码（只编码一次）
+    2. 计算每个位置前后各 window 个句子的平均向量的余弦相似度
+    3. 相似度低于第 (100 - breakpoint_percentile) 百分位处作为候选边界
+    4. chunk 向量取其句子向量的均值（归一化），无需再次编码
+
+    Returns:
+        tuple: (chunks, 形状 (len(chunks), dim) 的 chunk 向量)
+    """
+    print("🔪 开始语义分块...")
+    sentences = split_sentences(text)
+    print(f"  句子数: {len(sentences)}")
+    if not sentences:
+        return [], np.zeros((0, 0), dtype=np.float32)
+
+    sentence_embeddings = np.asarray(embedding_model.encode(
+        sentences,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        show_progress_bar=True
+    ), dtype=np.float32)
+
+    # 滑动窗口均值：prefix[i] 为前 i 个句子向量之和
+    n = len(sentences)
+    prefix = np.vstack([np.zeros((1, sentence_embeddings.shape[1]), dtype=np.float32),
+                        np.cumsum(sentence_embeddings, axis=0)])
+    gaps = np.arange(1, n)  # 在第 gap 个句子之前切分
+    left = prefix[gaps] - prefix[np.maximum(gaps - window, 0)]
+    right = prefix[np.minimum(gaps + window, n)] - prefix[gaps]
+    left /= np.linalg.norm(left, axis=1, keepdims=True) + 1e-12
+    right /= np.linalg.norm(right, axis=1, keepdims=True) + 1e-12
+    similarity = np.einsum('ij,ij->i', left, right)
+
+    cutoff = np.percentile(similarity, 100 - breakpoint_percentile) if len(similarity) else 0.0
+    breakpoints = set(gaps[similarity < cutoff].tolist())
+    print(f"  语义边界候选: {len(breakpoints)} 个 (相似度阈值 {cutoff:.3f})")
+
+    chunks, chunk_embeddings = [], []
+    current, current_len, current_start = [], 0, 0
+
+    def flush(end):
+        vector = sentence_embeddings[current_start:end].mean(axis=0)
+        chunk_embeddings.append(vector / (np.linalg.norm(vector) + 1e-12))
+        chunks.append(" ".join(current))
+
+    for i, sentence in enumerate(sentences):
+        # 语义边界（且当前块不太短）或超过最大长度时切分
+        too_long = current and current_len + len(sentence) + 1 > max_chunk_size
+        semantic_break = i in breakpoints and current_len >= min_chunk_size
+        if current and (too_long or semantic_break):
+            flush(i)
+            current, current_len, current_start = [], 0, i
+        current.append(sentence)
+        current_len += len(sentence) + 1
+    if current:
+        flush(n)
+
+    return chunks, np.vstack(chunk_embeddings).astype(np.float32)
+
 def save_chunks_to_json(chunks, corpus_name, output_path):
-    """保存chunks为Milvus可用的JSON格式"""
+    """保存chunks为Milvus可用的格式（.parquet 为列式存储，否则为JSON）"""
     
     milvus_data = []
     
@@ -176,9 +250,13 @@ def save_chunks_to_json(chunks, corpus_name, output_path):
         }
         milvus_data.append(entry)
     
-    # 保存为JSON
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(milvus_data, f, ensure_ascii=False, indent=2)
+    if output_path.endswith('.parquet'):
+        # 列式存储：可内存映射、按 row group 读取
+        write_chunks_parquet(milvus_data, output_path)
+    else:
+        # 保存为JSON
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(milvus_data, f, ensure_ascii=False, indent=2)
     
     print(f"💾 数据保存到: {output_path}")
     print(f"📋 总记录数: {len(milvus_data)}")
@@ -199,11 +277,19 @@ def save_chunks_to_json(chunks, corpus_name, output_path):
 def main():
     # 配置参数
     input_file = "./data/medical.json"
-    output_file = "./data/processed_medical_v2.json"
+    output_file = "./data/processed_medical_v2.parquet"
+    dedup_map_file = "./data/processed_medical_v2_dedup_map.json"
     
     # 分块参数
+    CHUNKING_MODE = "heading"  # "heading": 标题分块（标题过少时固定长度）; "semantic": 语义分块
     MAX_CHUNK_SIZE = 1200  # 最大块大小（字符）
     OVERLAP = 150          # 重叠大小
+    SEMANTIC_MIN_CHUNK_SIZE = 300  # 语义分块的最小块大小（字符）
+    SEMANTIC_BATCH_SIZE = 256      # 句子编码批大小
+
+    # 去重参数
+    DEDUP_THRESHOLD = 0.85  # MinHash 估计相似度阈值，>= 该值视为近重复
+    DEDUP_NUM_PERM = 128    # MinHash 置换数
     
     print("=" * 60)
     print("医疗数据预处理脚本 V2（智能分块）")
@@ -212,19 +298,50 @@ def main():
     # 1. 加载数据
     text, corpus_name = load_medical_data(input_file)
     
-    # 2. 智能分块
-    chunks = split_text_intelligently(
-        text, 
-        max_chunk_size=MAX_CHUNK_SIZE,
-        overlap=OVERLAP
-    )
+    # 2. 分块
+    chunk_embeddings = None
+    if CHUNKING_MODE == "semantic":
+        from sentence_transformers import SentenceTransformer
+        print(f"🧠 加载嵌入模型: {EMBEDDING_MODEL_NAME}")
+        embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        chunks, chunk_embeddings = split_text_semantically(
+            text,
+            embedding_model,
+            max_chunk_size=MAX_CHUNK_SIZE,
+            min_chunk_size=SEMANTIC_MIN_CHUNK_SIZE,
+            batch_size=SEMANTIC_BATCH_SIZE
+        )
+    else:
+        chunks = split_text_intelligently(
+            text, 
+            max_chunk_size=MAX_CHUNK_SIZE,
+            overlap=OVERLAP
+        )
     
     print(f"\n✅ 生成 {len(chunks)} 个chunks")
     
-    # 3. 保存处理结果
-    save_chunks_to_json(chunks, corpus_name, output_file)
-    
-    # 4. 显示样例
+    # 3. 近重复去除（重叠块、模板段落、重复的"Key points"等）
+    chunks, kept_indices, duplicate_map = deduplicate_chunks(
+        chunks,
+        threshold=DEDUP_THRESHOLD,
+        num_perm=DEDUP_NUM_PERM
+    )
+    duplicate_report = build_duplicate_report(duplicate_map, kept_indices, corpus_name)
+    with open(dedup_map_file, 'w', encoding='utf-8') as f:
+        json.dump(duplicate_report, f, ensure_ascii=False, indent=2)
+    print(f"🗂️  去重映射保存到: {dedup_map_file}")
+    
+    # 4. 保存处理结果
+    milvus_data = save_chunks_to_json(chunks, corpus_name, output_file)
+    
+    # 语义分块的句子向量已复用为 chunk 向量，向量化步骤可直接读取
+    if chunk_embeddings is not None:
+        n, dim = write_embeddings([item["id"] for item in milvus_data],
+                                  chunk_embeddings[kept_indices], EMBEDDINGS_FILE,
+                                  model_name=EMBEDDING_MODEL_NAME)
+        print(f"💾 chunk向量保存到: {EMBEDDINGS_FILE} ({n} × {dim})")
+    
+    # 5. 显示样例
     print(f"\n🔍 处理结果样例 (前3个chunk):")
     for i in range(min(3, len(chunks))):
         print(f"\nChunk {i} (长度: {len(chunks[i])} 字符):")
@@ -21,15 +21,17 @@ print(f"📁 项目根目录: {project_root}")
 print()
 # ========== 结束路径修复 ==========
 
-import json
 import time
 
 # 现在应该可以正常导入了
 from models_副本 import load_embedding_model
 from milvus_utils import get_milvus_client, setup_milvus_collection
+from columnar_store_副本 import load_chunk_records, load_embeddings, read_embedding_metadata, write_embeddings
+from entity_tagging_副本 import tag_chunks
 from config import (
     COLLECTION_NAME, EMBEDDING_DIM, EMBEDDING_MODEL_NAME, 
-    DATA_FILE, id_to_doc_map
+    DATA_FILE, EMBEDDINGS_FILE, id_to_doc_map,
+    MAX_ENTITIES_PER_CHUNK, ENTITY_ID_MAX_LENGTH
 )
 
 def load_and_prepare_data():
@@ -41,8 +43,7 @@ def load_and_prepare_data():
         print("请确保 config.py 中的 DATA_FILE 路径正确")
         return None, None
     
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_chunk_records(DATA_FILE)
     
     print(f"📊 加载 {len(data)} 条记录")
     
@@ -75,6 +76,33 @@ def load_and_prepare_data():
     print(f"✅ 准备 {len(texts)} 个有效文本")
     return texts, metadata_list
 
+def load_precomputed_embeddings(metadata_list):
+    """
+    读取 EMBEDDINGS_FILE 中已有的向量；只有晚于数据文件生成、由当前嵌入模型生成、维度与 EMBEDDING_DIM 一致
+    且覆盖全部chunk ID时才复用
+    """
+    if not os.path.exists(EMBEDDINGS_FILE):
+        return None
+    if os.path.getmtime(EMBEDDINGS_FILE) < os.path.getmtime(DATA_FILE):
+        print(f"⚠️  {EMBEDDINGS_FILE} 早于数据文件生成，将重新编码")
+        return None
+    try:
+        meta = read_embedding_metadata(EMBEDDINGS_FILE)
+        if meta["model_name"] != EMBEDDING_MODEL_NAME or meta["embedding_dim"] != EMBEDDING_DIM:
+            print(f"⚠️  {EMBEDDINGS_FILE} 由 {meta['model_name']}（{meta['embedding_dim']} 维）生成，"
+                  f"与当前配置 {EMBEDDING_MODEL_NAME}（{EMBEDDING_DIM} 维）不一致，将重新编码")
+            return None
+        ids, matrix = load_embeddings(EMBEDDINGS_FILE)
+    except Exception as e:
+        print(f"⚠️  无法读取已保存的向量，将重新编码: {e}")
+        return None
+    row_of_id = {doc_id: row for row, doc_id in enumerate(ids.to_pylist())}
+    if not all(m['id'] in row_of_id for m in metadata_list):
+        print(f"⚠️  {EMBEDDINGS_FILE} 与数据文件不一致，将重新编码")
+        return None
+    print(f"♻️  复用已保存的向量: {EMBEDDINGS_FILE}")
+    return list(matrix[[row_of_id[m['id']] for m in metadata_list]])
+
 def batch_vectorize(texts, model):
     """分批向量化文本"""
     print(f"🔢 开始向量化 {len(texts)} 个文本...")
@@ -161,6 +189,9 @@ def store_in_milvus(embeddings, metadata_list):
             schema.add_field(field_name="title", datatype=DataType.VARCHAR, max_length=255)
             schema.add_field(field_name="doc_id", datatype=DataType.VARCHAR, max_length=255)
             schema.add_field(field_name="chunk_idx", datatype=DataType.INT64)
+            schema.add_field(field_name="entity_ids", datatype=DataType.ARRAY,
+                             element_type=DataType.VARCHAR, max_capacity=MAX_ENTITIES_PER_CHUNK,
+                             max_length=ENTITY_ID_MAX_LENGTH)
             
             client.create_collection(
                 collection_name=COLLECTION_NAME,
@@ -182,7 +213,8 @@ def store_in_milvus(embeddings, metadata_list):
             "text": metadata['content'],
             "title": metadata['title'],
             "doc_id": metadata['id'],
-            "chunk_idx": metadata['chunk_index']
+            "chunk_idx": metadata['chunk_index'],
+            "entity_ids": metadata.get('entity_ids', [])
         })
     
     # 分批插入
@@ -223,6 +255,15 @@ def store_in_milvus(embeddings, metadata_list):
         print("✅ 索引创建成功")
     except Exception as e:
         print(f"⚠️  索引创建失败（可能已存在）: {e}")
+
+    # 实体数组字段的倒排索引，按实体过滤时无需逐条扫描
+    try:
+        scalar_index_params = client.prepare_index_params()
+        scalar_index_params.add_index(field_name="entity_ids", index_type="INVERTED")
+        client.create_index(collection_name=COLLECTION_NAME, index_params=scalar_index_params)
+        print("✅ entity_ids 倒排索引创建成功")
+    except Exception as e:
+        print(f"⚠️  entity_ids 倒排索引创建失败（过滤仍可用）: {e}")
     
     # 获取统计信息
     try:
@@ -255,33 +296,49 @@ def main():
     if not texts:
         print("❌ 数据加载失败，请检查DATA_FILE配置")
         return
+
+    # 1.5 实体标注（实验3 词典匹配器），写入 entity_ids 字段供检索时过滤
+    print(f"🏷️  标注chunk实体...")
+    entity_counts = tag_chunks(metadata_list)
+    tagged = sum(1 for m in metadata_list if m['entity_ids'])
+    print(f"✅ {tagged}/{len(metadata_list)} 个chunk含实体，共 {len(entity_counts)} 种实体")
+    for eid, count in sorted(entity_counts.items(), key=lambda kv: -kv[1])[:10]:
+        print(f"  {eid}: {count} 个chunk")
     
-    # 2. 加载模型
-    print(f"🧠 加载嵌入模型...")
-    start_time = time.time()
+    # 2. 复用已保存且与chunk表一致的向量（如语义分块阶段生成的），否则加载模型编码
+    embeddings = load_precomputed_embeddings(metadata_list)
+    if embeddings is None:
+        # 2. 加载模型
+        print(f"🧠 加载嵌入模型...")
+        start_time = time.time()
     
-    # 尝试使用缓存加载
-    model = load_embedding_model(EMBEDDING_MODEL_NAME)
-    if not model:
-        # 直接加载
-        try:
-            from sentence_transformers import SentenceTransformer
-            model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-            print("✅ 直接加载模型成功")
-        except Exception as e:
-            print(f"❌ 模型加载失败: {e}")
-            print("提示: BAAI/bge-small-zh-v1.5 模型约400MB，首次下载需要时间")
-            print("可以尝试: pip install sentence-transformers")
-            return
-    
-    model_load_time = time.time() - start_time
-    print(f"✅ 模型加载完成 ({model_load_time:.1f}秒)")
+        # 尝试使用缓存加载
+        model = load_embedding_model(EMBEDDING_MODEL_NAME)
+        if not model:
+            # 直接加载
+            try:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+                print("✅ 直接加载模型成功")
+            except Exception as e:
+                print(f"❌ 模型加载失败: {e}")
+                print("提示: BAAI/bge-small-zh-v1.5 模型约400MB，首次下载需要时间")
+                print("可以尝试: pip install sentence-transformers")
+                return
+
+        model_load_time = time.time() - start_time
+        print(f"✅ 模型加载完成 ({model_load_time:.1f}秒)")
     
-    # 3. 向量化
-    embeddings = batch_vectorize(texts, model)
-    if not embeddings:
-        print("❌ 向量化失败")
-        return
+        # 3. 向量化
+        embeddings = batch_vectorize(texts, model)
+        if not embeddings:
+            print("❌ 向量化失败")
+            return
+
+        # 向量与chunk表并列保存，后续步骤可内存映射读取而无需重新编码
+        n, dim = write_embeddings([m['id'] for m in metadata_list], embeddings, EMBEDDINGS_FILE,
+                                  model_name=EMBEDDING_MODEL_NAME)
+        print(f"💾 向量保存到: {EMBEDDINGS_FILE} ({n} × {dim})")
     
     # 4. 存储到Milvus
     success = store_in_milvus(embeddings, metadata_list)